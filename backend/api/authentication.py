@@ -0,0 +1,119 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+SHARED_KEY = 'auth_token:{}'
+DEFAULTS = {
+    'TIMEOUT': 60,
+    'MAX_SIZE': 10000,
+    'SHARED': False,
+}
+
+
+def get_option(name):
+    return getattr(settings, 'TOKEN_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def shared_key(key):
+    """В ключе общего кэша хранится хэш токена, а не сам токен."""
+    return SHARED_KEY.format(hashlib.sha256(key.encode()).hexdigest())
+
+
+class TokenCache:
+    """
+    Соответствие токен -> пользователь в памяти процесса с временем жизни
+    TIMEOUT и вытеснением давно не использованных записей сверх MAX_SIZE.
+    При SHARED = True промахи проверяются в общем кэше Django, чтобы
+    процессы не ходили в базу за одним и тем же токеном.
+
+    Сброс при выходе и изменении пользователя виден сразу в текущем
+    процессе и в общем кэше; остальные процессы видят его не позже
+    чем через TIMEOUT секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                user, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    return copy.copy(user)
+                del self._entries[key]
+        if not get_option('SHARED'):
+            return None
+        user = cache.get(shared_key(key))
+        if user is not None:
+            self._store(key, user)
+        return user
+
+    def set(self, key, user):
+        self._store(key, user)
+        if get_option('SHARED'):
+            cache.set(shared_key(key), user, get_option('TIMEOUT'))
+
+    def _store(self, key, user):
+        expires = time.monotonic() + get_option('TIMEOUT')
+        with self._lock:
+            self._entries[key] = (copy.copy(user), expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > get_option('MAX_SIZE'):
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if keys and get_option('SHARED'):
+            cache.delete_many([shared_key(key) for key in keys])
+
+    def delete_user(self, user_id):
+        """
+        Сброс всех токенов пользователя. Для общего кэша ключи токенов
+        берутся из базы, поэтому запрос выполняется только при SHARED.
+        """
+        with self._lock:
+            keys = [key for key, (user, _) in self._entries.items()
+                    if user.pk == user_id]
+        if get_option('SHARED'):
+            keys += Token.objects.filter(user_id=user_id).values_list(
+                'key', flat=True)
+        self.delete(*set(keys))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену без запроса к базе для токенов,
+    найденных в token_cache.
+    """
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key)
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return user, token
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                'Пользователь неактивен или удален.')
+        return user, Token(key=key, user=user)
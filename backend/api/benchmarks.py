@@ -0,0 +1,260 @@
+import json
+import random
+import time
+import tracemalloc
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Exists, OuterRef, Prefetch
+from django.test.utils import CaptureQueriesContext
+from recipes.counters import recount
+from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
+                            Recipe, Subscribe, Tag)
+from recipes.ranking import recompute_popularity
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient, APIRequestFactory
+from users.models import User
+
+from .representations import (IngredientRepresentation,
+                              RecipeFragmentRepresentation,
+                              SubscriptionRepresentation)
+from .serializers import (IngredientSerializer, RecipeFragmentSerializer,
+                          SubscribeSerializer)
+
+ENDPOINTS = {
+    'recipes': '/api/recipes/',
+    'recipes_anonymous': '/api/recipes/',
+    'recipes_popular': '/api/recipes/?ordering=popular',
+    'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+    'ingredients_search': '/api/ingredients/?name=мол',
+    'download_shopping_cart': '/api/recipes/download_shopping_cart/',
+}
+ANONYMOUS_ENDPOINTS = {'recipes_anonymous'}
+# Замеры очищают кэш и сбрасывают версии, поэтому выполняются
+# в отдельном локальном кэше, а не в настроенном для сервера.
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark',
+    }
+}
+
+TAGS = (
+    ('Завтрак', '#E26C2D', 'breakfast'),
+    ('Обед', '#49B64E', 'dinner'),
+    ('Ужин', '#8775D2', 'supper'),
+)
+
+
+def seed_dataset(users=50, recipes=500, ingredients_per_recipe=8,
+                 tags_per_recipe=2, favorites=100, carts=20,
+                 subscriptions=30, seed=1):
+    """
+    Заполняет базу синтетическими данными массовыми вставками.
+    favorites, carts и subscriptions задают число записей для
+    пользователя, от имени которого выполняются замеры.
+    Возвращает этого пользователя.
+    """
+    rng = random.Random(seed)
+    password = make_password('benchmark')
+    User.objects.bulk_create(
+        User(username=f'bench{number}', email=f'bench{number}@example.com',
+             first_name='Bench', last_name=str(number), password=password)
+        for number in range(users + 1)
+    )
+    all_users = list(User.objects.order_by('id'))
+    user, authors = all_users[0], all_users[1:]
+
+    for name, color, slug in TAGS:
+        Tag.objects.get_or_create(slug=slug,
+                                  defaults={'name': name, 'color': color})
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+
+    Recipe.objects.bulk_create(
+        Recipe(author=rng.choice(authors), name=f'Рецепт {number}',
+               text='Описание рецепта. ' * 20, cooking_time=rng.randint(5, 90),
+               image='recipes/image/benchmark.png')
+        for number in range(recipes)
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rng.sample(tag_ids, min(tags_per_recipe, len(tag_ids)))
+    )
+    IngredientRecipe.objects.bulk_create(
+        IngredientRecipe(recipe_id=recipe_id, ingredient_id=ingredient_id,
+                         amount=rng.randint(1, 500))
+        for recipe_id in recipe_ids
+        for ingredient_id in rng.sample(
+            ingredient_ids, min(ingredients_per_recipe, len(ingredient_ids)))
+    )
+    Favorite.objects.bulk_create(
+        Favorite(user=user, recipe_id=recipe_id)
+        for recipe_id in rng.sample(recipe_ids, min(favorites, recipes))
+    )
+    Cart.objects.bulk_create(
+        Cart(user=user, recipe_id=recipe_id)
+        for recipe_id in rng.sample(recipe_ids, min(carts, recipes))
+    )
+    Subscribe.objects.bulk_create(
+        Subscribe(user=user, following=author)
+        for author in rng.sample(authors, min(subscriptions, users))
+    )
+    # bulk_create не отправляет сигналы, счетчики и рейтинг
+    # пересчитываются разом.
+    recount()
+    recompute_popularity()
+    return user
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = round(percent / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def consume(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def measure_endpoint(client, url, iterations=30, warmup=3, cold=False):
+    """
+    Число запросов к базе, задержка (p50/p95) и выделения памяти
+    для одного эндпоинта. Память замеряется отдельным прогоном,
+    чтобы tracemalloc не искажал задержку.
+    """
+    for _ in range(warmup):
+        consume(client.get(url))
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = client.get(url)
+            size = len(consume(response))
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(context))
+    if cold:
+        cache.clear()
+    tracemalloc.start()
+    consume(client.get(url))
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'url': url,
+        'status': response.status_code,
+        'response_bytes': size,
+        'queries': max(queries),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'allocated_kib': round(allocated / 1024, 1),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(user, iterations=30, warmup=3, cold=False):
+    token, _ = Token.objects.get_or_create(user=user)
+    authenticated = APIClient()
+    authenticated.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    anonymous = APIClient()
+    results = {}
+    for name, url in ENDPOINTS.items():
+        client = anonymous if name in ANONYMOUS_ENDPOINTS else authenticated
+        results[name] = measure_endpoint(client, url, iterations, warmup,
+                                         cold)
+    return results
+
+
+def serializer_cases(user):
+    """
+    Пары (сериализатор DRF, быстрое представление) для списков
+    на одних и тех же заранее загруженных объектах.
+    """
+    request = APIRequestFactory().get('/api/recipes/')
+    request.user = user
+    recipes = list(Recipe.objects.with_related())
+    authors = list(User.objects.filter(following__user=user).annotate(
+        is_following=Exists(Subscribe.objects.filter(
+            user=user, following=OuterRef('pk')))
+    ).prefetch_related(
+        Prefetch('recipes', queryset=Recipe.objects.all(),
+                 to_attr='limited_recipes')
+    ))
+    ingredients = list(Ingredient.objects.all())
+    return {
+        'recipes': (
+            recipes,
+            lambda: RecipeFragmentSerializer(
+                recipes, many=True, context={'request': request}).data,
+            lambda: RecipeFragmentRepresentation(
+                {'request': request}).many(recipes),
+        ),
+        'subscriptions': (
+            authors,
+            lambda: SubscribeSerializer(authors, many=True).data,
+            lambda: SubscriptionRepresentation().many(authors),
+        ),
+        'ingredients': (
+            ingredients,
+            lambda: IngredientSerializer(ingredients, many=True).data,
+            lambda: IngredientRepresentation().many(ingredients),
+        ),
+    }
+
+
+def throughput(render, objects, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        render()
+    elapsed = time.perf_counter() - started
+    return round(len(objects) * iterations / elapsed)
+
+
+def run_serializer_benchmarks(user, iterations=30):
+    """
+    Пропускная способность сериализаторов DRF и быстрых представлений
+    (объектов в секунду) без запросов к базе и HTTP. same_output
+    подтверждает, что оба варианта дают одинаковый JSON.
+    """
+    results = {}
+    for name, (objects, serializer, representation) in serializer_cases(
+            user).items():
+        results[name] = {
+            'objects': len(objects),
+            'same_output': (json.loads(json.dumps(serializer()))
+                            == representation()),
+            'serializer_per_s': throughput(serializer, objects, iterations),
+            'representation_per_s': throughput(representation, objects,
+                                               iterations),
+        }
+        results[name]['speedup'] = round(
+            results[name]['representation_per_s']
+            / max(results[name]['serializer_per_s'], 1), 2)
+    return results
+
+
+def compare_results(previous, current, tolerance=0.2):
+    """
+    Сравнение с предыдущим прогоном: рост числа запросов или p95
+    больше чем на tolerance считается регрессией.
+    """
+    report = []
+    for name, result in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        regressions = []
+        if result['queries'] > before['queries']:
+            regressions.append('queries')
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append('p95_ms')
+        report.append((name, before, result, regressions))
+    return report
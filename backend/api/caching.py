@@ -0,0 +1,78 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from backend.versions import get_version, get_versions
+
+PUBLIC_MAX_AGE = 60
+
+RECIPE_LIST_KEY = 'recipes:list:{}:{}:{}'
+RECIPE_LIST_TIMEOUT = 60 * 5
+
+
+def normalize_query(query_params):
+    """
+    Параметры запроса в каноническом виде: порядок ключей и
+    повторяющихся значений не влияет на результат.
+    """
+    return '&'.join(
+        f'{key}={value}'
+        for key in sorted(query_params)
+        for value in sorted(query_params.getlist(key))
+    )
+
+
+def get_recipe_list_cache_key(request):
+    """
+    Ключ кэша списка рецептов: поколение recipes увеличивается при любой
+    записи рецептов, тегов и ингредиентов рецептов, поэтому старые ключи
+    просто перестают запрашиваться и вытесняются по таймауту.
+    """
+    fingerprint = hashlib.md5(
+        normalize_query(request.query_params).encode()).hexdigest()
+    return RECIPE_LIST_KEY.format(
+        get_version('recipes'), request.get_host(), fingerprint)
+
+
+def conditional(get_scopes, user_dependent=False, max_age=PUBLIC_MAX_AGE):
+    """
+    Декоратор метода вьюсета: добавляет ETag и Last-Modified по версиям
+    областей, возвращенных get_scopes(view, request, *args, **kwargs),
+    и отвечает 304 без сериализации, если данные не менялись.
+
+    Для ответов, зависящих от пользователя, в ETag входит версия
+    пользователя, а кэшировать ответ разрешено только клиенту.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            scopes = list(get_scopes(self, request, *args, **kwargs))
+            private = user_dependent and request.user.is_authenticated
+            if private:
+                scopes.append(f'user:{request.user.pk}')
+            versions = get_versions(*scopes, store=False)
+            fingerprint = ';'.join(
+                f'{scope}={versions[scope][0]}' for scope in scopes)
+            etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+            last_modified = max(
+                modified for _, modified in versions.values())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                return response
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            if private:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, max_age=max_age)
+            if user_dependent:
+                patch_vary_headers(response, ('Authorization',))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,152 @@
+import csv
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from recipes.models import Cart, IngredientRecipe
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'FreeSans'
+FONT_PATH = os.path.join(settings.BASE_DIR, 'data', 'FreeSans.ttf')
+
+TITLE = 'Список ингредиентов'
+FILENAME = 'shopping_list'
+
+SHOPPING_LIST_CACHE_KEY = 'shopping_list:{}'
+SHOPPING_LIST_CACHE_TIMEOUT = 60 * 60 * 24
+
+PDF_TITLE_SIZE = 24
+PDF_LINE_SIZE = 16
+PDF_TOP = 800
+PDF_BOTTOM = 50
+PDF_LEFT = 75
+PDF_LINE_HEIGHT = 25
+
+
+def register_fonts():
+    """
+    Регистрация шрифтов для PDF. Вызывается один раз при старте процесса.
+    """
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH, 'UTF-8'))
+
+
+def get_shopping_list(user):
+    """
+    Суммарное количество каждого ингредиента из корзины пользователя.
+    Агрегат считается в базе данных один раз и хранится в кэше
+    до изменения корзины или рецептов в ней.
+    """
+    key = SHOPPING_LIST_CACHE_KEY.format(user.id)
+    items = cache.get(key)
+    if items is None:
+        items = list(IngredientRecipe.objects.filter(
+            recipe__carts__user=user
+        ).values(
+            'ingredient__name',
+            'ingredient__measurement_unit'
+        ).annotate(amount=Sum('amount')).order_by('ingredient__name'))
+        cache.set(key, items, SHOPPING_LIST_CACHE_TIMEOUT)
+    return items
+
+
+def invalidate_shopping_lists(user_ids):
+    """
+    Сброс кэша списков покупок после фиксации транзакции.
+    """
+    keys = [SHOPPING_LIST_CACHE_KEY.format(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_recipe_shopping_lists(**lookups):
+    """
+    Сброс кэша списков покупок у всех, в чьей корзине есть рецепты,
+    подходящие под условия lookups для модели Cart.
+    """
+    invalidate_shopping_lists(set(
+        Cart.objects.filter(**lookups).values_list('user_id', flat=True)))
+
+
+def format_line(count, item):
+    return (f'{count} {item["ingredient__name"]} '
+            f'{item["amount"]} '
+            f'{item["ingredient__measurement_unit"]}')
+
+
+def render_pdf(items):
+    """
+    PDF со списком покупок: строки, не поместившиеся на страницу,
+    переносятся на следующую.
+    """
+    response = HttpResponse(content_type='application/pdf')
+    c = canvas.Canvas(response)
+    c.setFont(FONT_NAME, size=PDF_TITLE_SIZE)
+    c.drawString(200, PDF_TOP, TITLE)
+    c.setFont(FONT_NAME, size=PDF_LINE_SIZE)
+    height = PDF_TOP - 2 * PDF_LINE_HEIGHT
+    for count, item in enumerate(items, 1):
+        if height < PDF_BOTTOM:
+            c.showPage()
+            c.setFont(FONT_NAME, size=PDF_LINE_SIZE)
+            height = PDF_TOP
+        c.drawString(PDF_LEFT, height, format_line(count, item))
+        height -= PDF_LINE_HEIGHT
+    c.showPage()
+    c.save()
+    return response
+
+
+def iter_txt(items):
+    yield f'{TITLE}\n'
+    for count, item in enumerate(items, 1):
+        yield f'{format_line(count, item)}\n'
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(items):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'amount', 'measurement_unit'))
+    for item in items:
+        yield writer.writerow((item['ingredient__name'],
+                               item['amount'],
+                               item['ingredient__measurement_unit']))
+
+
+def render_txt(items):
+    return StreamingHttpResponse(
+        iter_txt(items), content_type='text/plain; charset=utf-8')
+
+
+def render_csv(items):
+    return StreamingHttpResponse(
+        iter_csv(items), content_type='text/csv; charset=utf-8')
+
+
+EXPORT_FORMATS = {
+    'pdf': render_pdf,
+    'csv': render_csv,
+    'txt': render_txt,
+}
+
+
+def shopping_list_response(items, export_format='pdf'):
+    """
+    Ответ с файлом списка покупок в выбранном формате.
+    """
+    response = EXPORT_FORMATS[export_format](items)
+    response['Content-Disposition'] = (f'attachment; '
+                                       f'filename="{FILENAME}.'
+                                       f'{export_format}"')
+    return response
@@ -0,0 +1,163 @@
+import base64
+import binascii
+import uuid
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from PIL import Image
+from recipes.images import THUMBNAIL_SIZES, thumbnail_name
+from rest_framework import serializers
+
+from .tags import tag_registry
+
+
+class TagRecordField(serializers.Field):
+    """
+    id тега, проверенный по реестру тегов без запроса к базе.
+    Возвращает запись TagRecord.
+    """
+    default_error_messages = {
+        'does_not_exist': 'Тег с id {pk_value} не найден.',
+        'incorrect_type': 'Ожидался id тега, получено {data_type}.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        record = tag_registry.get(pk)
+        if record is None:
+            self.fail('does_not_exist', pk_value=pk)
+        return record
+
+    def to_representation(self, value):
+        return value.id
+
+
+def build_file_url(name, request=None):
+    """Ссылка на файл хранилища, абсолютная при наличии запроса."""
+    url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def get_thumbnail_urls(recipe, request=None):
+    if not recipe.thumbnails or not recipe.image:
+        return None
+    name = recipe.image.name
+    return {
+        size: {
+            'url': build_file_url(
+                thumbnail_name(name, size, recipe.thumbnails), request),
+            'webp': build_file_url(
+                thumbnail_name(name, size, 'webp'), request),
+        }
+        for size in THUMBNAIL_SIZES
+    }
+
+
+class ThumbnailsField(serializers.Field):
+    """
+    Ссылки на миниатюры изображения рецепта:
+    {"list": {"url": ..., "webp": ...}, "card": ..., "detail": ...}.
+    Пока миниатюры не созданы, возвращается None, и клиент
+    использует исходное изображение из поля image.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        return get_thumbnail_urls(recipe, self.context.get('request'))
+
+
+class StreamingBase64ImageField(serializers.ImageField):
+    """
+    Изображение в виде строки base64 (data URI или без заголовка).
+    Строка декодируется частями во временный файл, который остается
+    в памяти до IMAGE_SPOOL_SIZE байт. Размер файла проверяется
+    до декодирования, размеры в пикселях - по заголовку изображения,
+    без распаковки пикселей.
+    """
+    ALLOWED_FORMATS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif'}
+    CHUNK_SIZE = 64 * 1024
+    HEADER_MARKER = ';base64,'
+    HEADER_MAX_LENGTH = 100
+    IMAGE_SPOOL_SIZE = 1024 * 1024
+    default_error_messages = {
+        'invalid_image': 'Загрузите корректное изображение в base64.',
+        'invalid_format': 'Допустимые форматы изображения: JPEG, PNG, GIF.',
+        'too_large': 'Размер изображения не должен превышать {max_size} байт.',
+        'too_many_pixels': ('Изображение не должно быть больше '
+                            '{max_pixels} пикселей.'),
+    }
+
+    def __init__(self, max_size=None, max_pixels=None, **kwargs):
+        self.max_size = max_size
+        self.max_pixels = max_pixels
+        super().__init__(**kwargs)
+
+    def get_limits(self):
+        """Ограничения из аргументов поля или из настроек."""
+        return (self.max_size or settings.RECIPE_IMAGE_MAX_SIZE,
+                self.max_pixels or settings.RECIPE_IMAGE_MAX_PIXELS)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str) or not data:
+            self.fail('invalid_image')
+        max_size, max_pixels = self.get_limits()
+        marker = data.find(self.HEADER_MARKER, 0, self.HEADER_MAX_LENGTH)
+        start = marker + len(self.HEADER_MARKER) if marker != -1 else 0
+        if (len(data) - start) * 3 // 4 > max_size:
+            self.fail('too_large', max_size=max_size)
+        file = self.decode(data, start)
+        try:
+            extension = self.check_image(file, max_pixels)
+        except serializers.ValidationError:
+            file.close()
+            raise
+        return File(file, name=f'{uuid.uuid4()}.{extension}')
+
+    def decode(self, data, start):
+        file = SpooledTemporaryFile(max_size=self.IMAGE_SPOOL_SIZE)
+        for offset in range(start, len(data), self.CHUNK_SIZE):
+            try:
+                file.write(base64.b64decode(
+                    data[offset:offset + self.CHUNK_SIZE], validate=True))
+            except (binascii.Error, ValueError):
+                file.close()
+                self.fail('invalid_image')
+        file.seek(0)
+        return file
+
+    def check_image(self, file, max_pixels):
+        """
+        Формат и размеры берутся из заголовка, verify проверяет
+        структуру файла без декодирования пикселей.
+        """
+        try:
+            image = Image.open(file)
+            image_format = image.format
+            width, height = image.size
+        except Image.DecompressionBombError:
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        except Exception:
+            self.fail('invalid_image')
+        if image_format not in self.ALLOWED_FORMATS:
+            self.fail('invalid_format')
+        if width * height > max_pixels:
+            self.fail('too_many_pixels', max_pixels=max_pixels)
+        try:
+            image.verify()
+        except Exception:
+            self.fail('invalid_image')
+        file.seek(0)
+        return self.ALLOWED_FORMATS[image_format]
@@ -1,27 +1,85 @@
+from django import forms
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Lower, Upper
 from django_filters import rest_framework as django_filter
 from recipes.models import Recipe
-from rest_framework.filters import SearchFilter
 from users.models import User
 
+from .tags import tag_registry
 
-class IngredientSearchFilter(SearchFilter):
-    search_param = 'name'
+
+class UnicodeLower(Lower):
+    """
+    LOWER с учетом Unicode: встроенный LOWER в SQLite меняет регистр
+    только латиницы, поэтому там вызывается функция UNICODE_LOWER,
+    которую api.signals регистрирует для каждого соединения.
+    """
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, function='UNICODE_LOWER',
+                           **extra_context)
+
+
+class SlugListField(forms.Field):
+    """Все значения повторяющегося параметра запроса."""
+    widget = forms.SelectMultiple
+
+    def to_python(self, value):
+        return [slug for slug in value or () if slug]
+
+
+class TagSlugsFilter(django_filter.Filter):
+    """
+    Рецепты, у которых есть хотя бы один из тегов. Slug переводятся в id
+    по реестру тегов без запроса к базе, отбор выполняется
+    подзапросом id__in по таблице связей: без JOIN рецептов с тегами
+    строки не дублируются, а COUNT(*) для пагинации остается простым.
+    Неизвестные slug пропускаются.
+    """
+    field_class = SlugListField
+
+    def filter(self, queryset, value):
+        if not value:
+            return queryset
+        tag_ids = tag_registry.ids_for_slugs(value)
+        if not tag_ids:
+            return queryset.none()
+        return queryset.filter(id__in=Recipe.tags.through.objects.filter(
+            tag_id__in=tag_ids).values('recipe_id'))
 
 
 class RecipeFilters(django_filter.FilterSet):
     """
     Настройка фильтров модели рецептов по:
-    автору, тегам, подписке и нахождению в корозине.
+    названию, автору, тегам, подписке и нахождению в корозине.
     """
+    name = django_filter.CharFilter(method='get_name')
     author = django_filter.ModelChoiceFilter(queryset=User.objects.all())
-    tags = django_filter.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = TagSlugsFilter()
     is_favorited = django_filter.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = django_filter.BooleanFilter(
         method='get_is_in_shopping_cart')
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('name', 'author', 'tags', 'is_favorited',
+                  'is_in_shopping_cart')
+
+    def get_name(self, queryset, name, value):
+        """
+        Поиск по подстроке названия. В PostgreSQL дополнительно находит
+        похожие названия по триграммам (индекс recipe_name_trgm_idx),
+        в остальных СУБД ограничивается поиском по подстроке без учета
+        регистра, в том числе для кириллицы в SQLite.
+        """
+        if connection.vendor != 'postgresql':
+            return queryset.annotate(name_lower=UnicodeLower('name')).filter(
+                name_lower__contains=value.lower())
+        return queryset.annotate(name_upper=Upper('name')).filter(
+            Q(name__icontains=value)
+            | Q(name_upper__trigram_similar=value.upper())
+        )
 
     def get_is_favorited(self, queryset, name, value):
         if self.request.user.is_authenticated and value:
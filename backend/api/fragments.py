@@ -0,0 +1,84 @@
+import hashlib
+
+from django.core.cache import cache
+from recipes.models import USER_FLAGS, Recipe
+
+from backend.middleware import profile_section
+from backend.versions import get_versions
+
+from .representations import RecipeFragmentRepresentation
+from .serializers import RecipeListSerializer
+
+FRAGMENT_KEY = 'recipe:fragment:{}:{}:{}'
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+# Миниатюры создаются в фоне или командой generate_thumbnails, версия
+# рецепта при этом сбрасывается только через общий кэш; без него
+# фрагмент без миниатюр не должен жить сутки.
+PENDING_FRAGMENT_TIMEOUT = 60
+# Кроме самого рецепта фрагмент содержит теги, автора и ингредиенты.
+SHARED_SCOPES = ('tags', 'users', 'ingredients')
+
+
+def get_fragment_keys(recipe_ids, request):
+    """
+    Ключи фрагментов: версия рецепта, версии общих областей и адрес
+    сайта, от которого зависят абсолютные ссылки на изображения.
+    Все версии читаются одним обращением к кэшу. Версии уникальны,
+    поэтому вытесненная и созданная заново версия не совпадет
+    с ключом старого фрагмента, даже если фрагмент еще хранится.
+    """
+    scopes = [f'recipe:{pk}' for pk in recipe_ids]
+    versions = get_versions(*scopes, *SHARED_SCOPES)
+    shared = '.'.join(str(versions[scope][0]) for scope in SHARED_SCOPES)
+    site = hashlib.md5(request.build_absolute_uri('/').encode()).hexdigest()
+    return {
+        pk: FRAGMENT_KEY.format(
+            pk, f'{versions[scope][0]}.{shared}', site)
+        for pk, scope in zip(recipe_ids, scopes)
+    }
+
+
+def get_fragments(recipe_ids, request):
+    """
+    Представления рецептов без признаков пользователя. Отсутствующие
+    в кэше рецепты загружаются пакетно и собираются в словари быстрым
+    представлением RecipeFragmentRepresentation.
+    """
+    keys = get_fragment_keys(recipe_ids, request)
+    cached = cache.get_many(keys.values())
+    fragments = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in recipe_ids if pk not in fragments]
+    if missing:
+        recipes = Recipe.objects.filter(pk__in=missing).with_related()
+        representation = RecipeFragmentRepresentation({'request': request})
+        fresh = {item['id']: item for item in representation.many(recipes)}
+        pending = {pk for pk, fragment in fresh.items()
+                   if fragment['image'] and fragment['thumbnails'] is None}
+        cache.set_many({keys[pk]: fragment for pk, fragment in fresh.items()
+                        if pk not in pending}, FRAGMENT_TIMEOUT)
+        cache.set_many({keys[pk]: fresh[pk] for pk in pending},
+                       PENDING_FRAGMENT_TIMEOUT)
+        fragments.update(fresh)
+    return fragments
+
+
+def render_recipes(recipes, request):
+    """
+    Представления рецептов в формате RecipeListSerializer: фрагменты
+    из кэша и признаки пользователя, посчитанные в запросе страницы
+    аннотациями with_user_flags. Рецепты, удаленные между запросом
+    страницы и загрузкой фрагментов, пропускаются.
+    """
+    with profile_section():
+        fragments = get_fragments([recipe.pk for recipe in recipes], request)
+        result = []
+        for recipe in recipes:
+            fragment = fragments.get(recipe.pk)
+            if fragment is None:
+                continue
+            result.append({
+                field: (getattr(recipe, field) if field in USER_FLAGS
+                        else fragment[field])
+                for field in RecipeListSerializer.Meta.fields
+            })
+        return result
@@ -0,0 +1,12 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+    """
+    Параметр format выбирает формат выгружаемого файла,
+    а не рендерер DRF, поэтому ошибки всегда отдаются первым рендерером.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
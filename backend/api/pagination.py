@@ -0,0 +1,83 @@
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+
+MAX_PAGE_SIZE = 100
+
+
+class LimitPageNumberPagination(PageNumberPagination):
+    """
+    Постраничная навигация по номеру страницы с размером
+    из параметра limit, ограниченным MAX_PAGE_SIZE.
+    """
+    page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Навигация по курсору без COUNT(*) и OFFSET,
+    опирается на индекс recipe_pub_date_id_idx. Явная сортировка
+    queryset, например по рейтингу, имеет приоритет.
+    """
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        if queryset.query.order_by:
+            return tuple(queryset.query.order_by)
+        return super().get_ordering(request, queryset, view)
+
+
+class SubscriptionCursorPagination(CursorPagination):
+    ordering = ('-id',)
+    page_size_query_param = 'limit'
+    max_page_size = MAX_PAGE_SIZE
+
+
+class OptionalCursorPagination(BasePagination):
+    """
+    По умолчанию навигация по номеру страницы, как ожидает фронтенд;
+    параметр pagination=cursor включает навигацию по курсору.
+    Ссылки next и previous сохраняют этот параметр.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    page_number_class = LimitPageNumberPagination
+    cursor_class = CursorPagination
+
+    def __init__(self):
+        self.page_number_paginator = self.page_number_class()
+        self.cursor_paginator = self.cursor_class()
+        self.paginator = self.page_number_paginator
+
+    def is_cursor_mode(self, request):
+        return (request.query_params.get(self.mode_query_param)
+                == self.cursor_mode)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.paginator = self.cursor_paginator
+        else:
+            self.paginator = self.page_number_paginator
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_results(self, data):
+        return self.paginator.get_results(data)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_schema_fields(self, view):
+        return self.paginator.get_schema_fields(view)
+
+
+class RecipePagination(OptionalCursorPagination):
+    cursor_class = RecipeCursorPagination
+
+
+class SubscriptionPagination(OptionalCursorPagination):
+    cursor_class = SubscriptionCursorPagination
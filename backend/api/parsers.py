@@ -0,0 +1,35 @@
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework import exceptions, status
+from rest_framework.parsers import JSONParser
+
+
+class RequestTooLarge(exceptions.APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Размер запроса превышает допустимый.'
+    default_code = 'request_too_large'
+
+
+class LimitedJSONParser(JSONParser):
+    """
+    JSON-парсер с ограничением размера тела DATA_UPLOAD_MAX_MEMORY_SIZE.
+    Запрос с большим Content-Length отклоняется до чтения тела,
+    тело без Content-Length читается не дальше границы.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        request = (parser_context or {}).get('request')
+        if request is not None and limit is not None:
+            try:
+                length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                length = 0
+            if length > limit:
+                raise RequestTooLarge
+            body = stream.read(limit + 1)
+            if len(body) > limit:
+                raise RequestTooLarge
+            stream = BytesIO(body)
+        return super().parse(stream, media_type, parser_context)
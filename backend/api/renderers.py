@@ -0,0 +1,58 @@
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'),
+                   (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def encode_default(obj):
+    """
+    Типы, которых нет в orjson (Decimal, ленивые строки и т.д.),
+    и даты, которые DRF форматирует по-своему.
+    """
+    return JSONEncoder().default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON-рендерер на orjson, если он установлен и не отключен
+    настройкой FAST_JSON_RENDERER; иначе, а также для ответов с отступами
+    и данных, которые orjson не кодирует, используется стандартный
+    JSONRenderer. Результат совпадает с JSONRenderer в компактном виде.
+
+    Байты считаются готовым JSON и отдаются без изменений: так кэш
+    может хранить закодированные ответы.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, (bytes, bytearray)):
+            return bytes(data)
+        if (orjson is None or data is None
+                or not getattr(settings, 'FAST_JSON_RENDERER', True)
+                or self.get_indent(accepted_media_type or '',
+                                   renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(
+                data, default=encode_default,
+                option=orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и JSONRenderer, экранируем разделители строк,
+        # недопустимые в JavaScript.
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in content:
+                content = content.replace(separator, escaped)
+        return content
+
+
+def encode_json(data):
+    """Готовый JSON для хранения в кэше и в памяти процесса."""
+    return FastJSONRenderer().render(data)
@@ -0,0 +1,112 @@
+from operator import attrgetter
+
+from backend.middleware import profile_section
+
+from .fields import build_file_url, get_thumbnail_urls
+from .tags import tag_registry
+
+
+class Representation:
+    """
+    Быстрое представление объектов только для чтения. Геттеры полей
+    собираются один раз при создании: метод get_<поле>, если он есть,
+    иначе attrgetter по атрибуту source из sources или по имени поля.
+    Результат - обычные словари с тем же набором и порядком полей,
+    что у соответствующего сериализатора DRF.
+    """
+    fields = ()
+    sources = {}
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.request = self.context.get('request')
+        self.getters = tuple(
+            (field, getattr(self, f'get_{field}', None)
+             or attrgetter(self.sources.get(field, field)))
+            for field in self.fields
+        )
+
+    def to_dict(self, obj):
+        return {field: getter(obj) for field, getter in self.getters}
+
+    def many(self, objects):
+        to_dict = self.to_dict
+        with profile_section():
+            return [to_dict(obj) for obj in objects]
+
+
+class UserRepresentation(Representation):
+    """Как CustomUserSerializer."""
+    fields = ('email', 'username', 'first_name', 'id', 'last_name')
+
+
+class IngredientRepresentation(Representation):
+    """Как IngredientSerializer."""
+    fields = ('name', 'measurement_unit', 'id')
+
+
+class IngredientAmountRepresentation(Representation):
+    """Как IngredientRecipeSerializer, для select_related('ingredient')."""
+    fields = ('id', 'name', 'measurement_unit', 'amount')
+    sources = {
+        'id': 'ingredient_id',
+        'name': 'ingredient.name',
+        'measurement_unit': 'ingredient.measurement_unit',
+    }
+
+
+class RecipeImageMixin:
+
+    def get_image(self, recipe):
+        if not recipe.image:
+            return None
+        return build_file_url(recipe.image.name, self.request)
+
+    def get_thumbnails(self, recipe):
+        return get_thumbnail_urls(recipe, self.request)
+
+
+class RecipeShortRepresentation(RecipeImageMixin, Representation):
+    """Как SimpleRecipeSerializer."""
+    fields = ('id', 'name', 'cooking_time', 'image', 'thumbnails')
+
+
+class RecipeFragmentRepresentation(RecipeImageMixin, Representation):
+    """
+    Не зависящая от пользователя часть RecipeListSerializer для рецептов,
+    загруженных через RecipeQuerySet.with_related().
+    """
+    fields = ('id', 'tags', 'author', 'ingredients', 'name', 'image',
+              'thumbnails', 'text', 'cooking_time')
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        self.author = UserRepresentation(context)
+        self.ingredients = IngredientAmountRepresentation(context)
+
+    def get_tags(self, recipe):
+        return tag_registry.data_for_ids(tag.id for tag in recipe.tags.all())
+
+    def get_author(self, recipe):
+        return self.author.to_dict(recipe.author)
+
+    def get_ingredients(self, recipe):
+        return self.ingredients.many(recipe.ingredientrecipe_set.all())
+
+
+class SubscriptionRepresentation(Representation):
+    """
+    Как SubscribeSerializer, для авторов из SubscribeViewSet.get_queryset:
+    с аннотацией is_following и рецептами в limited_recipes.
+    Рецепты, как и в сериализаторе, выводятся с относительными ссылками.
+    """
+    fields = ('email', 'username', 'first_name', 'id', 'last_name',
+              'is_subscribed', 'recipes', 'recipes_count')
+    sources = {'is_subscribed': 'is_following'}
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        self.recipes = RecipeShortRepresentation()
+
+    def get_recipes(self, author):
+        return self.recipes.many(author.limited_recipes)
@@ -0,0 +1,91 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+
+from recipes.models import Ingredient
+
+from backend.versions import get_version, is_current
+
+from .renderers import encode_json
+
+INGREDIENT_SEARCH_LIMIT = 20
+INGREDIENT_SEARCH_MAX_LIMIT = 100
+
+IngredientSnapshot = namedtuple(
+    'IngredientSnapshot', ('version', 'built', 'keys', 'items', 'json'))
+
+
+class IngredientIndex:
+    """
+    Префиксный индекс ингредиентов в памяти процесса.
+
+    Названия хранятся отсортированными в нижнем регистре, поиск по префиксу
+    выполняется бинарным поиском, без обращения к базе данных.
+    Индекс строится при первом запросе и перестраивается, когда меняется
+    версия области ingredients: она хранится в кэше, поэтому изменение
+    увидят все процессы, использующие общий кэш. Без общего кэша индекс
+    обновляется не реже чем раз в IN_MEMORY_INDEX_MAX_AGE секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = IngredientSnapshot(None, 0, (), (), b'[]')
+
+    def _build(self, version):
+        rows = sorted(
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit'),
+            key=lambda row: (row[1].lower(), row[0])
+        )
+        items = tuple(
+            {'name': name, 'measurement_unit': measurement_unit, 'id': pk}
+            for pk, name, measurement_unit in rows
+        )
+        return IngredientSnapshot(
+            version, time.monotonic(),
+            tuple(name.lower() for _, name, _ in rows), items,
+            encode_json(items))
+
+    def _get_snapshot(self):
+        """
+        Актуальный снимок индекса. Снимок заменяется одним присваиванием,
+        поэтому параллельный поиск всегда видит согласованные данные.
+        """
+        version = get_version('ingredients')
+        snapshot = self._snapshot
+        if is_current(snapshot, version):
+            return snapshot
+        with self._lock:
+            if not is_current(self._snapshot, version):
+                self._snapshot = self._build(version)
+            return self._snapshot
+
+    def json(self):
+        """Готовый JSON полного списка для /api/ingredients/."""
+        return self._get_snapshot().json
+
+    def search(self, query, limit):
+        """
+        Первые limit ингредиентов, название которых начинается с query,
+        а после них содержащих query в середине названия.
+        """
+        snapshot = self._get_snapshot()
+        query = query.lower()
+        keys, items = snapshot.keys, snapshot.items
+        result = []
+        start = bisect_left(keys, query)
+        position = start
+        while (position < len(keys) and len(result) < limit
+               and keys[position].startswith(query)):
+            result.append(items[position])
+            position += 1
+        if len(result) < limit:
+            for index, key in enumerate(keys):
+                if query in key and not key.startswith(query):
+                    result.append(items[index])
+                    if len(result) == limit:
+                        break
+        return result
+
+
+ingredient_index = IngredientIndex()
@@ -1,12 +1,18 @@
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
-from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
-                            Recipe, Subscribe, Tag)
+from recipes.images import schedule_thumbnails
+from recipes.models import (USER_FLAGS, Cart, Favorite, Ingredient,
+                            IngredientRecipe, Recipe, Subscribe, Tag)
+from recipes.signals import recipe_ingredients_changed
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from users.models import User
 
+from .fields import StreamingBase64ImageField, TagRecordField, ThumbnailsField
+from .tags import tag_registry
+
+BULK_MAX_IDS = 100
+
 
 class CustomUserCreateSerializer(UserCreateSerializer):
     """Сериализатор регистрации пользователей"""
@@ -82,23 +88,30 @@ class AddIngredientSerializer(serializers.ModelSerializer):
 
 class RecipeListSerializer(serializers.ModelSerializer):
     """Сериализатор для отображения рецепта"""
-    tags = TagSerializer(read_only=True, many=True)
+    tags = serializers.SerializerMethodField()
     author = CustomUserSerializer(read_only=True)
     ingredients = serializers.SerializerMethodField(read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    thumbnails = ThumbnailsField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients', 'is_favorited',
-                  'is_in_shopping_cart', 'name', 'image', 'text',
-                  'cooking_time')
+                  'is_in_shopping_cart', 'name', 'image', 'thumbnails',
+                  'text', 'cooking_time')
+
+    def get_tags(self, obj):
+        """Теги собираются из реестра по id, загруженным с рецептом."""
+        return tag_registry.data_for_ids(tag.id for tag in obj.tags.all())
 
     def get_ingredients(self, obj):
-        queryset = IngredientRecipe.objects.filter(recipe=obj)
-        return IngredientRecipeSerializer(queryset, many=True).data
+        return IngredientRecipeSerializer(
+            obj.ingredientrecipe_set.all(), many=True).data
 
     def get_is_favorited(self, obj):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -106,6 +119,8 @@ class RecipeListSerializer(serializers.ModelSerializer):
                                        recipe__id=obj.id).exists()
 
     def get_is_in_shopping_cart(self, obj):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -113,13 +128,23 @@ class RecipeListSerializer(serializers.ModelSerializer):
                                    recipe__id=obj.id).exists()
 
 
+class RecipeFragmentSerializer(RecipeListSerializer):
+    """
+    Часть представления рецепта, не зависящая от пользователя:
+    кэшируется целиком, см. api.fragments.
+    """
+
+    class Meta(RecipeListSerializer.Meta):
+        fields = tuple(field for field in RecipeListSerializer.Meta.fields
+                       if field not in USER_FLAGS)
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для создания рецепта"""
     author = CustomUserSerializer(read_only=True)
     ingredients = AddIngredientSerializer(many=True)
-    image = Base64ImageField()
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True)
+    image = StreamingBase64ImageField()
+    tags = serializers.ListField(child=TagRecordField())
 
     class Meta:
         model = Recipe
@@ -167,10 +192,51 @@ class RecipeSerializer(serializers.ModelSerializer):
             amount=ingredient['amount'])
             for ingredient in ingredients])
 
-    @transaction.atomic
     def create_tags(self, tags, recipe):
-        for tag in tags:
-            recipe.tags.add(tag)
+        recipe.tags.add(*(tag.id for tag in tags))
+
+    def update_tags(self, tags, recipe):
+        """
+        Добавляет и удаляет только изменившиеся теги рецепта.
+        """
+        current = set(recipe.tags.values_list('id', flat=True))
+        new = {tag.id for tag in tags}
+        if current - new:
+            recipe.tags.remove(*(current - new))
+        if new - current:
+            recipe.tags.add(*(new - current))
+
+    def update_ingredients(self, ingredients, recipe):
+        """
+        Сравнивает ингредиенты рецепта с новыми и применяет разницу
+        одним удалением, одной вставкой и одним обновлением.
+        Возвращает True, если состав рецепта изменился.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in IngredientRecipe.objects.filter(recipe=recipe)
+        }
+        new = {item['id'].id: item['amount'] for item in ingredients}
+        removed = [current[ingredient_id].id
+                   for ingredient_id in current.keys() - new.keys()]
+        added = [
+            IngredientRecipe(recipe=recipe, ingredient_id=ingredient_id,
+                             amount=new[ingredient_id])
+            for ingredient_id in new.keys() - current.keys()
+        ]
+        changed = []
+        for ingredient_id in current.keys() & new.keys():
+            item = current[ingredient_id]
+            if item.amount != new[ingredient_id]:
+                item.amount = new[ingredient_id]
+                changed.append(item)
+        if removed:
+            IngredientRecipe.objects.filter(id__in=removed).delete()
+        if added:
+            IngredientRecipe.objects.bulk_create(added)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        return bool(removed or added or changed)
 
     @transaction.atomic
     def create(self, validated_data):
@@ -184,58 +250,79 @@ class RecipeSerializer(serializers.ModelSerializer):
                                        author=author)
         self.create_tags(tags_data, recipe)
         self.create_bulk(ingredients, recipe)
+        schedule_thumbnails(recipe)
         return recipe
 
     @transaction.atomic
     def update(self, instance, validated_data):
         """
-        Метод редактирования рецептов.
+        Метод редактирования рецептов: записываются только изменения
+        тегов и ингредиентов. Для нового изображения заново
+        создаются миниатюры, миниатюры старого удаляются.
         """
-        instance.tags.clear()
-        IngredientRecipe.objects.filter(recipe=instance).delete()
-        self.create_bulk(validated_data.pop('ingredients'), instance)
-        self.create_tags(validated_data.pop('tags'), instance)
-        return super().update(instance, validated_data)
+        self.update_tags(validated_data.pop('tags'), instance)
+        if self.update_ingredients(validated_data.pop('ingredients'),
+                                   instance):
+            recipe_ingredients_changed.send(
+                sender=IngredientRecipe, recipe_ids=[instance.pk])
+        previous = instance.image.name
+        if 'image' in validated_data:
+            validated_data['thumbnails'] = ''
+        recipe = super().update(instance, validated_data)
+        if 'image' in validated_data:
+            schedule_thumbnails(recipe, previous)
+        return recipe
 
     def to_representation(self, instance):
         return SimpleRecipeSerializer(instance).data
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
-    """Сериализатор списка избранного"""
+class UserRecipeSerializer(serializers.ModelSerializer):
+    """
+    Добавление рецепта текущему пользователю. Повтор определяется
+    уникальным ограничением при вставке, а не отдельной проверкой
+    exists(): запись остается единственной и при одновременных запросах.
+    """
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    duplicate_error = None
+
     class Meta:
-        model = Favorite
         fields = ('user', 'recipe')
 
-    def validate(self, data):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        recipe = data['recipe']
-        if Favorite.objects.filter(user=request.user, recipe=recipe).exists():
-            raise serializers.ValidationError({
-                'error': 'Рецепт уже есть в избранном!'
-            })
-        return data
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(
+                {'errors': self.duplicate_error})
 
     def to_representation(self, instance):
-        request = self.context.get('request')
-        context = {'request': request}
         return SimpleRecipeSerializer(
-            instance.recipe, context=context).data
+            instance.recipe, context=self.context).data
+
+
+class FavoriteSerializer(UserRecipeSerializer):
+    """Сериализатор списка избранного"""
+    duplicate_error = 'Рецепт уже есть в избранном!'
+
+    class Meta(UserRecipeSerializer.Meta):
+        model = Favorite
 
 
 class SimpleRecipeSerializer(serializers.ModelSerializer):
     """
     Сериализатор для упрощенного отображения модели рецептов.
     """
+    thumbnails = ThumbnailsField()
+
     class Meta:
         """
         Мета параметры сериализатора упрощенного
         отображения модели рецептов.
         """
         model = Recipe
-        fields = ('id', 'name', 'cooking_time', 'image')
+        fields = ('id', 'name', 'cooking_time', 'image', 'thumbnails')
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -253,6 +340,8 @@ class SubscribeSerializer(serializers.ModelSerializer):
         """
         Метод обработки параметра is_subscribed подписок.
         """
+        if hasattr(obj, 'is_following'):
+            return obj.is_following
         request = self.context.get('request')
         if request.user.is_anonymous:
             return False
@@ -260,32 +349,37 @@ class SubscribeSerializer(serializers.ModelSerializer):
                                         following__id=obj.id).exists()
 
     def get_recipes_count(self, obj):
-        """Определение количества рецептов автора"""
-        return Recipe.objects.filter(author__id=obj.id).count()
+        """Количество рецептов автора из счетчика recipes_count"""
+        return obj.recipes_count
 
     def get_recipes(self, obj):
         """Получение данных рецептов автора,
         в зависимости от параметра recipes_limit."""
-
-        request = self.context.get('request')
-        if request.GET.get('recipes_limit'):
-            recipes_limit = int(request.GET.get('recipes_limit'))
-            queryset = Recipe.objects.filter(author__id=obj.id)[:recipes_limit]
+        if hasattr(obj, 'limited_recipes'):
+            queryset = obj.limited_recipes
         else:
             queryset = Recipe.objects.filter(author__id=obj.id)
+            recipes_limit = self.context.get('recipes_limit')
+            if recipes_limit is not None:
+                queryset = queryset[:recipes_limit]
         return SimpleRecipeSerializer(queryset, many=True).data
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Cart
-        fields = ('user', 'recipe')
+class BulkIdsSerializer(serializers.Serializer):
+    """Список id рецептов или авторов для массовых операций."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_MAX_IDS,
+    )
 
-    def validate(self, data):
-        user = self.context.get('request').user
-        recipe = self.context.get('recipe_id')
-        if Cart.objects.filter(user=user,
-                               recipe=recipe).exists():
-            raise serializers.ValidationError({
-                'errors': 'Рецепт уже добавлен в список покупок'})
-        return data
+    def validate_ids(self, ids):
+        """Повторы убираются с сохранением порядка."""
+        return list(dict.fromkeys(ids))
+
+
+class ShoppingCartSerializer(UserRecipeSerializer):
+    duplicate_error = 'Рецепт уже добавлен в список покупок'
+
+    class Meta(UserRecipeSerializer.Meta):
+        model = Cart
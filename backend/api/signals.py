@@ -0,0 +1,110 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from recipes.models import Cart, Favorite, Ingredient, Recipe, Tag
+from recipes.signals import recipe_ingredients_changed
+from rest_framework.authtoken.models import Token
+from users.models import User
+
+from backend.versions import bump_version
+
+from .authentication import token_cache
+from .exports import (invalidate_recipe_shopping_lists,
+                      invalidate_shopping_lists)
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def ingredient_changed(**kwargs):
+    """Перестроение индекса и сброс HTTP-кэша ингредиентов."""
+    bump_version('ingredients', 'recipes')
+
+
+@receiver([post_save, pre_delete], sender=Ingredient)
+def ingredient_shopping_lists_changed(signal, instance, created=False,
+                                      **kwargs):
+    """
+    Название и единицы измерения входят в списки покупок. При удалении
+    списки сбрасываются до каскадного удаления строк рецептов.
+    """
+    if not created:
+        invalidate_recipe_shopping_lists(
+            recipe__ingredientrecipe__ingredient=instance)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tag_changed(**kwargs):
+    bump_version('tags', 'recipes')
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def recipe_changed(instance, **kwargs):
+    bump_version(f'recipe:{instance.pk}', 'recipes')
+
+
+@receiver(recipe_ingredients_changed)
+def ingredients_of_recipes_changed(recipe_ids, **kwargs):
+    """
+    Один сброс на пакет рецептов. У IngredientRecipe нет сигналов
+    моделей, поэтому удаление строк остается быстрым (fast delete).
+    """
+    bump_version('recipes', *(f'recipe:{pk}' for pk in recipe_ids))
+    invalidate_recipe_shopping_lists(recipe_id__in=recipe_ids)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(instance, action, pk_set=None, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, Recipe):
+        recipe_ids = [instance.pk]
+    else:
+        recipe_ids = pk_set or []
+    bump_version(
+        'recipes', *(f'recipe:{recipe_id}' for recipe_id in recipe_ids))
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=Cart)
+def user_recipe_flags_changed(instance, **kwargs):
+    """Признаки is_favorited и is_in_shopping_cart зависят от пользователя."""
+    bump_version(f'user:{instance.user_id}')
+
+
+@receiver([post_save, post_delete], sender=Cart)
+def cart_changed(instance, **kwargs):
+    """
+    Изменение корзины, в том числе каскадное при удалении рецепта
+    или пользователя, сбрасывает список покупок ее владельца.
+    """
+    invalidate_shopping_lists([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(instance, created=False, update_fields=None, **kwargs):
+    """
+    Данные авторов входят в рецепты. Новый пользователь еще не автор
+    ни одного рецепта, а вход в систему данные не меняет.
+    """
+    if created or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    token_cache.delete_user(instance.pk)
+    bump_version('users', 'recipes', f'user:{instance.pk}')
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(instance, **kwargs):
+    """Выход пользователя удаляет токен: он больше не должен приниматься."""
+    token_cache.delete(instance.key)
+
+
+def unicode_lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+@receiver(connection_created)
+def register_sqlite_functions(connection, **kwargs):
+    """Функция UNICODE_LOWER для поиска по названию (filtres.UnicodeLower)."""
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function(
+            'UNICODE_LOWER', 1, unicode_lower)
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import namedtuple
+
+from recipes.models import Tag
+
+from backend.versions import get_version, is_current
+
+from .renderers import encode_json
+
+TagSnapshot = namedtuple('TagSnapshot',
+                         ('version', 'built', 'by_id', 'by_slug', 'json'))
+
+
+class TagRecord:
+    """Неизменяемая запись тега в реестре."""
+    __slots__ = ('id', 'name', 'color', 'slug', 'data')
+
+    def __init__(self, pk, name, color, slug):
+        self.id = pk
+        self.name = name
+        self.color = color
+        self.slug = slug
+        self.data = {'id': pk, 'name': name, 'color': color, 'slug': slug}
+
+
+class TagRegistry:
+    """
+    Все теги в памяти процесса: id -> запись, slug -> запись и готовый
+    JSON списка для /api/tags/. Теги меняются только через админку,
+    поэтому реестр загружается одним запросом и перестраивается, когда
+    меняется версия области tags: ее увеличивают сигналы сохранения
+    и удаления тегов, а общий кэш делает изменение видимым всем
+    процессам. Без общего кэша реестр обновляется не реже чем раз
+    в IN_MEMORY_INDEX_MAX_AGE секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = TagSnapshot(None, 0, {}, {}, b'[]')
+
+    def _build(self, version):
+        records = [
+            TagRecord(*row) for row in Tag.objects.order_by('id').values_list(
+                'id', 'name', 'color', 'slug')
+        ]
+        return TagSnapshot(
+            version,
+            time.monotonic(),
+            {record.id: record for record in records},
+            {record.slug: record for record in records},
+            encode_json([record.data for record in records]))
+
+    def _get_snapshot(self):
+        """
+        Актуальный снимок реестра, заменяемый одним присваиванием:
+        параллельные запросы не видят наполовину обновленный реестр.
+        """
+        version = get_version('tags')
+        snapshot = self._snapshot
+        if is_current(snapshot, version):
+            return snapshot
+        with self._lock:
+            if not is_current(self._snapshot, version):
+                self._snapshot = self._build(version)
+            return self._snapshot
+
+    def get(self, pk):
+        return self._get_snapshot().by_id.get(pk)
+
+    def ids_for_slugs(self, slugs):
+        """id тегов с переданными slug, неизвестные slug пропускаются."""
+        by_slug = self._get_snapshot().by_slug
+        return [by_slug[slug].id for slug in slugs if slug in by_slug]
+
+    def data_for_ids(self, pks):
+        """Представления тегов по id в порядке id."""
+        by_id = self._get_snapshot().by_id
+        return [dict(by_id[pk].data) for pk in sorted(pks) if pk in by_id]
+
+    def json(self):
+        return self._get_snapshot().json
+
+
+tag_registry = TagRegistry()
@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CreateUserViewSet, DownloadCart, FavoriteAPIView,
-                    IngredientViewSet, RecipeViewSet, ShoppingCartAPIView,
-                    SubscribeViewSet, TagViewSet)
+from .views import (BulkFavoriteView, BulkShoppingCartView, BulkSubscribeView,
+                    CreateUserViewSet, DownloadCart, FavoriteAPIView,
+                    IngredientViewSet, ProfilingStatsView, RecipeViewSet,
+                    ShoppingCartAPIView, SubscribeViewSet, TagViewSet)
 
 app_name = 'api'
 
@@ -15,6 +16,12 @@ router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('users', CreateUserViewSet, basename='users')
 
 urlpatterns = [
+    path('recipes/favorite/bulk/', BulkFavoriteView.as_view(),
+         name='favorite_bulk'),
+    path('recipes/shopping_cart/bulk/', BulkShoppingCartView.as_view(),
+         name='shopping_cart_bulk'),
+    path('users/subscribe/bulk/', BulkSubscribeView.as_view(),
+         name='subscribe_bulk'),
     path('recipes/<int:id>/favorite/', FavoriteAPIView.as_view(),
          name='favorite'),
     path('recipes/<int:id>/shopping_cart/',
@@ -25,9 +32,10 @@ urlpatterns = [
          name='download_shopping_cart'),
     path('users/subscriptions/',
          SubscribeViewSet.as_view({'get': 'list'}), name='subscriptions'),
-    path('users/<users_id>/subscribe/',
+    path('users/<int:users_id>/subscribe/',
          SubscribeViewSet.as_view({'post': 'create',
                                    'delete': 'delete'}), name='subscribe'),
+    path('metrics/', ProfilingStatsView.as_view(), name='metrics'),
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
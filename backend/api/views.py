@@ -1,26 +1,57 @@
-from http import HTTPStatus
-
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, Prefetch, Subquery
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from recipes.models import (Cart, Favorite, Ingredient, IngredientRecipe,
-                            Recipe, Subscribe, Tag)
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
+from recipes.counters import sync_counters
+from recipes.models import Cart, Favorite, Ingredient, Recipe, Subscribe, Tag
+from recipes.ranking import refresh_popularity
 from rest_framework import permissions, status, views, viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 from users.models import User
 
-from .filtres import IngredientSearchFilter, RecipeFilters
+from backend.middleware import profile_section, route_stats
+from backend.versions import bump_version
+
+from .caching import (RECIPE_LIST_TIMEOUT, conditional,
+                      get_recipe_list_cache_key)
+from .exports import (EXPORT_FORMATS, get_shopping_list,
+                      invalidate_shopping_lists, shopping_list_response)
+from .filtres import RecipeFilters
+from .fragments import render_recipes
+from .negotiation import ExportContentNegotiation
+from .pagination import RecipePagination, SubscriptionPagination
 from .permissions import IsAuthorOrReadOnly
-from .serializers import (CustomUserCreateSerializer, FavoriteSerializer,
-                          IngredientSerializer, RecipeListSerializer,
-                          RecipeSerializer, ShoppingCartSerializer,
-                          SubscribeSerializer, TagSerializer)
+from .renderers import encode_json
+from .representations import SubscriptionRepresentation
+from .search import (INGREDIENT_SEARCH_LIMIT, INGREDIENT_SEARCH_MAX_LIMIT,
+                     ingredient_index)
+from .serializers import (BulkIdsSerializer, CustomUserCreateSerializer,
+                          FavoriteSerializer, IngredientSerializer,
+                          RecipeListSerializer, RecipeSerializer,
+                          ShoppingCartSerializer, SubscribeSerializer,
+                          TagSerializer)
+from .tags import tag_registry
+
+RECIPE_ORDERINGS = {
+    'popular': ('-popularity', '-id'),
+}
+
+
+def delete_relation(queryset, target_model, target_id, error):
+    """
+    Удаление связи пользователя с рецептом или автором без отдельной
+    проверки exists(). Если удалять нечего, 404 для несуществующего
+    объекта и 400, если связи не было.
+    """
+    deleted, _ = queryset.delete()
+    if deleted:
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    get_object_or_404(target_model, pk=target_id)
+    return Response({'errors': error}, status=status.HTTP_400_BAD_REQUEST)
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -32,6 +63,21 @@ class TagViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.AllowAny]
     pagination_class = None
 
+    @conditional(lambda view, request, *args, **kwargs: ['tags'])
+    def list(self, request, *args, **kwargs):
+        """Готовый JSON списка тегов из реестра без сериализации."""
+        return Response(tag_registry.json())
+
+    @conditional(lambda view, request, *args, **kwargs: ['tags'])
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            record = tag_registry.get(int(kwargs['pk']))
+        except ValueError:
+            record = None
+        if record is None:
+            raise Http404
+        return Response(record.data)
+
 
 class IngredientViewSet(viewsets.ModelViewSet):
     """
@@ -40,10 +86,31 @@ class IngredientViewSet(viewsets.ModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [permissions.AllowAny]
-    filter_backends = [IngredientSearchFilter]
-    search_fields = ('^name',)
     pagination_class = None
 
+    def get_search_limit(self):
+        try:
+            limit = int(self.request.query_params['limit'])
+        except (KeyError, ValueError):
+            return INGREDIENT_SEARCH_LIMIT
+        return max(1, min(limit, INGREDIENT_SEARCH_MAX_LIMIT))
+
+    @conditional(lambda view, request, *args, **kwargs: ['ingredients'])
+    def list(self, request, *args, **kwargs):
+        """
+        Поиск ингредиентов по параметру name через индекс в памяти:
+        сначала совпадения по началу названия, затем по подстроке.
+        """
+        name = request.query_params.get('name')
+        if not name:
+            return Response(ingredient_index.json())
+        return Response(
+            ingredient_index.search(name, self.get_search_limit()))
+
+    @conditional(lambda view, request, *args, **kwargs: ['ingredients'])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 
 class CreateUserViewSet(UserViewSet):
     """
@@ -60,31 +127,90 @@ class SubscribeViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SubscribeSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SubscriptionPagination
+
+    def get_recipes_limit(self):
+        """
+        Разбор параметра recipes_limit один раз на запрос.
+        """
+        try:
+            recipes_limit = int(self.request.query_params['recipes_limit'])
+        except (KeyError, ValueError):
+            return None
+        return recipes_limit if recipes_limit >= 0 else None
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['recipes_limit'] = self.get_recipes_limit()
+        return context
 
     def get_queryset(self):
+        """
+        Подписки с числом рецептов и первыми recipes_limit рецептами
+        каждого автора: число запросов не зависит от количества подписок.
+        Порядок -id, как в навигации по курсору, чтобы страницы
+        не повторяли и не пропускали авторов.
+        """
+        user = self.request.user
+        recipes = Recipe.objects.all()
+        recipes_limit = self.get_recipes_limit()
+        if recipes_limit is not None:
+            recipes = recipes.filter(id__in=Subquery(
+                Recipe.objects.filter(
+                    author=OuterRef('author')
+                ).values('id')[:recipes_limit]
+            ))
         return User.objects.filter(
-            following__user=self.request.user)
+            following__user=user
+        ).annotate(
+            is_following=Exists(Subscribe.objects.filter(
+                user=user, following=OuterRef('pk')))
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes,
+                     to_attr='limited_recipes')
+        ).order_by('-id')
+
+    def list(self, request, *args, **kwargs):
+        """
+        Страница подписок собирается быстрым представлением
+        SubscriptionRepresentation вместо SubscribeSerializer.
+        """
+        representation = SubscriptionRepresentation()
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(representation.many(queryset))
+        return self.get_paginated_response(representation.many(page))
 
     def create(self, request, *args, **kwargs):
         """
-        Метод создания подписки.
+        Метод создания подписки. Повторная подписка определяется
+        уникальным ограничением unique_subscribe при вставке.
         """
-        user_id = self.kwargs.get('users_id')
-        user = get_object_or_404(User, id=user_id)
-        Subscribe.objects.create(
-            user=request.user, following=user)
-        return Response(HTTPStatus.CREATED)
+        author = get_object_or_404(User, id=self.kwargs['users_id'])
+        if author == request.user:
+            return Response({'errors': 'Нельзя подписаться на самого себя'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                Subscribe.objects.create(user=request.user, following=author)
+        except IntegrityError:
+            return Response({'errors': 'Вы уже подписаны на этого автора'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        author.is_following = True
+        serializer = self.get_serializer(author)
+        with profile_section():
+            data = serializer.data
+        return Response(data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, *args, **kwargs):
         """
         Метод удаления подписок.
         """
-        author_id = self.kwargs['users_id']
-        user_id = request.user.id
-        subscribe = get_object_or_404(
-            Subscribe, user__id=user_id, following__id=author_id)
-        subscribe.delete()
-        return Response(HTTPStatus.NO_CONTENT)
+        return delete_relation(
+            Subscribe.objects.filter(user=request.user,
+                                     following_id=self.kwargs['users_id']),
+            User, self.kwargs['users_id'], 'Вы не подписаны на этого автора')
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -93,9 +219,61 @@ class RecipeViewSet(viewsets.ModelViewSet):
     """
     queryset = Recipe.objects.all()
     permission_classes = [IsAuthorOrReadOnly]
+    pagination_class = RecipePagination
     filter_class = RecipeFilters
     filter_backends = [DjangoFilterBackend, ]
 
+    def get_queryset(self):
+        """
+        Для чтения достаточно строк рецептов с признаками пользователя:
+        остальное представление берется из кэша фрагментов.
+        Параметр ordering=popular сортирует по заранее
+        рассчитанному рейтингу популярности.
+        """
+        if self.request.method not in permissions.SAFE_METHODS:
+            return Recipe.objects.all()
+        queryset = Recipe.objects.with_user_flags(self.request.user)
+        ordering = RECIPE_ORDERINGS.get(
+            self.request.query_params.get('ordering'))
+        if ordering:
+            return queryset.order_by(*ordering)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """
+        Страница рецептов из кэшированных фрагментов. Списки для
+        анонимных пользователей кэшируются еще и целиком, готовым
+        JSON, по параметрам запроса и поколению рецептов.
+        """
+        if request.user.is_authenticated:
+            return self.render_list(request)
+        key = get_recipe_list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        data = encode_json(self.render_list(request).data)
+        cache.set(key, data, RECIPE_LIST_TIMEOUT)
+        return Response(data)
+
+    def render_list(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(render_recipes(list(queryset), request))
+        return self.get_paginated_response(render_recipes(page, request))
+
+    @conditional(
+        lambda view, request, *args, **kwargs: [
+            f'recipe:{kwargs["pk"]}', 'tags', 'users', 'ingredients'],
+        user_dependent=True
+    )
+    def retrieve(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        data = render_recipes([recipe], request)
+        if not data:
+            raise Http404
+        return Response(data[0])
+
     def get_serializer_class(self):
         """
         Метод выбора сериализатора в зависимости от запроса.
@@ -108,22 +286,19 @@ class RecipeViewSet(viewsets.ModelViewSet):
 class ShoppingCartAPIView(views.APIView):
 
     def post(self, request, id):
-        user_id = request.user.id
-        data = {'recipe': id, 'user': user_id}
         serializer = ShoppingCartSerializer(
-            data=data, context={'request': request}
+            data={'recipe': id}, context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        with profile_section():
+            data = serializer.data
+        return Response(data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, id):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=id)
-        deleting_obj = Cart.objects.all().filter(
-            user=user, recipe=recipe)
-        deleting_obj.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return delete_relation(
+            Cart.objects.filter(user=request.user, recipe_id=id),
+            Recipe, id, 'Рецепта нет в списке покупок')
 
 
 class DownloadCart(viewsets.ModelViewSet):
@@ -131,60 +306,145 @@ class DownloadCart(viewsets.ModelViewSet):
        Сохранение файла списка покупок.
        """
     permission_classes = [permissions.IsAuthenticated]
+    content_negotiation_class = ExportContentNegotiation
 
     def download(self, request):
         """
-        Метод сохранения списка покупок в формате PDF.
-        """
-        ingredients = IngredientRecipe.objects.filter(
-            recipe__carts__user=request.user
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(amount=Sum('amount'))
-        return DownloadCart.pdf(ingredients)
-
-    @staticmethod
-    def pdf(ingredients):
-        pdfmetrics.registerFont(
-            TTFont('FreeSans', 'data/FreeSans.ttf', 'UTF-8'))
-
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = ('attachment; '
-                                           'filename="shopping_list.pdf"')
-        c = canvas.Canvas(response)
-        c.setFont('FreeSans', size=24)
-        c.drawString(200, 800, 'Список ингредиентов')
-        c.setFont('FreeSans', size=16)
-        height = 750
-        for count, data in enumerate(ingredients, 1):
-            c.drawString(75, height, (f'{count} {data["ingredient__name"]} '
-                                      f'{data["amount"]} '
-                                      f'{data["ingredient__measurement_unit"]}'
-                                      ))
-            height -= 25
-        c.showPage()
-        c.save()
-        return response
+        Метод сохранения списка покупок в формате PDF, CSV или TXT,
+        выбранном параметром format.
+        """
+        export_format = request.query_params.get('format', 'pdf')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'format': f'Допустимые форматы: '
+                           f'{", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST)
+        ingredients = get_shopping_list(request.user)
+        return shopping_list_response(ingredients, export_format)
 
 
 class FavoriteAPIView(views.APIView):
 
     def post(self, request, id):
-        user_id = request.user.id
-        data = {"user": user_id, "recipe": id}
         serializer = FavoriteSerializer(
-            data=data, context={"request": request}
+            data={'recipe': id}, context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        with profile_section():
+            data = serializer.data
+        return Response(data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, id):
+        return delete_relation(
+            Favorite.objects.filter(user=request.user, recipe_id=id),
+            Recipe, id, 'Рецепта нет в избранном')
+
+
+class BulkRelationView(views.APIView):
+    """
+    Массовое добавление рецептов или авторов текущему пользователю.
+    id проверяются одним запросом, новые записи вставляются
+    bulk_create(ignore_conflicts=True) в одной транзакции, для каждого
+    id возвращается результат: created, exists или not_found.
+    bulk_create не отправляет сигналы, поэтому счетчики и кэши
+    обновляются в after_create.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+    target_model = None
+    target_field = None
+
+    def get_error(self, user, target_id):
+        """Причина отказа для найденного объекта или None."""
+
+    def after_create(self, user, target_ids):
+        pass
+
+    def get_statuses(self, user, ids):
+        field = f'{self.target_field}_id'
+        found = set(self.target_model.objects.filter(
+            pk__in=ids).values_list('pk', flat=True))
+        existing = set(self.model.objects.filter(
+            user=user, **{f'{field}__in': found}
+        ).values_list(field, flat=True))
+        statuses = {}
+        for target_id in ids:
+            if target_id not in found:
+                statuses[target_id] = 'not_found'
+            elif target_id in existing:
+                statuses[target_id] = 'exists'
+            else:
+                statuses[target_id] = (self.get_error(user, target_id)
+                                       or 'created')
+        return statuses
+
+    def post(self, request):
+        serializer = BulkIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
         user = request.user
-        recipe = get_object_or_404(Recipe, id=id)
-        deleting_obj = Favorite.objects.all().filter(user=user, recipe=recipe)
-        if not deleting_obj:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        deleting_obj.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        with transaction.atomic():
+            statuses = self.get_statuses(user, ids)
+            created = [target_id for target_id in ids
+                       if statuses[target_id] == 'created']
+            if created:
+                self.model.objects.bulk_create(
+                    [self.model(user=user,
+                                **{f'{self.target_field}_id': target_id})
+                     for target_id in created],
+                    ignore_conflicts=True)
+                self.after_create(user, created)
+        return Response({'results': [
+            {'id': target_id, 'status': statuses[target_id]}
+            for target_id in ids
+        ]})
+
+
+class BulkFavoriteView(BulkRelationView):
+    model = Favorite
+    target_model = Recipe
+    target_field = 'recipe'
+
+    def after_create(self, user, target_ids):
+        sync_counters(Recipe, target_ids, 'favorites_count')
+        refresh_popularity(target_ids)
+        bump_version(f'user:{user.pk}')
+
+
+class BulkShoppingCartView(BulkRelationView):
+    model = Cart
+    target_model = Recipe
+    target_field = 'recipe'
+
+    def after_create(self, user, target_ids):
+        sync_counters(Recipe, target_ids, 'carts_count')
+        refresh_popularity(target_ids)
+        bump_version(f'user:{user.pk}')
+        # bulk_create не отправляет сигналы, кэш сбрасывается здесь.
+        invalidate_shopping_lists([user.pk])
+
+
+class BulkSubscribeView(BulkRelationView):
+    model = Subscribe
+    target_model = User
+    target_field = 'following'
+
+    def get_error(self, user, target_id):
+        if target_id == user.pk:
+            return 'self'
+        return None
+
+    def after_create(self, user, target_ids):
+        sync_counters(User, target_ids, 'followers_count')
+
+
+class ProfilingStatsView(views.APIView):
+    """
+    Скользящие перцентили времени ответа и числа запросов
+    по маршрутам текущего процесса. Доступно только администраторам.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(route_stats.snapshot())
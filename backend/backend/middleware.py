@@ -0,0 +1,170 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('backend.profiling')
+
+ROLLING_WINDOW = 500
+DUPLICATE_THRESHOLD = 3
+NUMBER_PATTERN = re.compile(r'\b\d+\b')
+
+_local = threading.local()
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[round(percent / 100 * (len(ordered) - 1))]
+
+
+class RequestProfile:
+    """Метрики одного запроса: SQL и время сериализации."""
+
+    def __init__(self):
+        self.queries = Counter()
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.query_count += 1
+            self.queries[NUMBER_PATTERN.sub('?', sql)] += 1
+
+    def duplicates(self):
+        """
+        Запросы, повторившиеся с разными параметрами: признак N+1.
+        """
+        return {sql: count for sql, count in self.queries.items()
+                if count >= DUPLICATE_THRESHOLD}
+
+
+class RouteStats:
+    """
+    Скользящие окна последних ROLLING_WINDOW запросов по каждому маршруту
+    в пределах процесса.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(lambda: {
+            'duration': deque(maxlen=ROLLING_WINDOW),
+            'queries': deque(maxlen=ROLLING_WINDOW),
+            'sql': deque(maxlen=ROLLING_WINDOW),
+        })
+
+    def add(self, route, duration, queries, sql_time):
+        with self._lock:
+            stats = self._routes[route]
+            stats['duration'].append(duration)
+            stats['queries'].append(queries)
+            stats['sql'].append(sql_time)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {route: {key: list(values)
+                              for key, values in stats.items()}
+                      for route, stats in self._routes.items()}
+        return {
+            route: {
+                'requests': len(stats['duration']),
+                'p50_ms': round(percentile(stats['duration'], 50), 2),
+                'p95_ms': round(percentile(stats['duration'], 95), 2),
+                'p99_ms': round(percentile(stats['duration'], 99), 2),
+                'sql_p95_ms': round(percentile(stats['sql'], 95), 2),
+                'queries_p50': percentile(stats['queries'], 50),
+                'queries_max': max(stats['queries']),
+            }
+            for route, stats in routes.items()
+        }
+
+
+route_stats = RouteStats()
+
+
+@contextmanager
+def profile_section():
+    """
+    Учет времени сериализации в профиле текущего запроса. Вызывается
+    явно на путях сборки ответа: быстрые представления, рецепты
+    из фрагментов, serializer.data во вьюхах. Вложенные участки
+    не учитываются дважды, без профилирования ничего не замеряется.
+    """
+    profile = getattr(_local, 'profile', None)
+    if profile is None or profile.serializer_depth:
+        yield
+        return
+    profile.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.serializer_time += time.perf_counter() - started
+        profile.serializer_depth -= 1
+
+
+class RequestProfilingMiddleware:
+    """
+    Профилирование запросов: число и время SQL-запросов, время
+    сериализации и размер ответа. Результат отдается в заголовке
+    Server-Timing, пишется строкой JSON в лог backend.profiling
+    и копится в скользящих перцентилях по маршрутам.
+    Включается настройкой REQUEST_PROFILING.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        _local.profile = profile
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile):
+                response = self.get_response(request)
+        finally:
+            _local.profile = None
+        duration = (time.perf_counter() - started) * 1000
+        sql_time = profile.sql_time * 1000
+        serializer_time = profile.serializer_time * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match else request.path_info
+        size = None if response.streaming else len(response.content)
+        duplicates = profile.duplicates()
+
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={sql_time:.2f};desc="{profile.query_count} queries"',
+            f'serializer;dur={serializer_time:.2f}',
+            f'total;dur={duration:.2f}',
+        ))
+        route_stats.add(route, duration, profile.query_count, sql_time)
+        logger.info(json.dumps({
+            'method': request.method,
+            'route': route,
+            'status': response.status_code,
+            'duration_ms': round(duration, 2),
+            'queries': profile.query_count,
+            'sql_ms': round(sql_time, 2),
+            'serializer_ms': round(serializer_time, 2),
+            'response_bytes': size,
+            'duplicate_queries': duplicates,
+        }, ensure_ascii=False))
+        if duplicates:
+            logger.warning('Повторяющиеся запросы на %s %s: %s',
+                           request.method, route, duplicates)
+        return response
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'recipes.apps.RecipesConfig',
     'users.apps.UsersConfig',
     'api.apps.ApiConfig',
@@ -56,6 +57,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -101,6 +103,63 @@ DATABASES = {
         'PORT': os.getenv('DB_PORT', default='5432')
     }
 }
+# Profiling
+# Число SQL-запросов, время SQL и сериализации по каждому запросу:
+# заголовок Server-Timing, лог backend.profiling и /api/metrics/.
+
+REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', default='False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'backend.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Cache
+# Локальный кэш подходит для разработки и тестов; в продакшене с несколькими
+# воркерами нужен общий бэкенд (в infra/docker-compose.yml - Memcached),
+# иначе сброс кэша виден только в одном процессе. Команды load_ingredients
+# и generate_thumbnails работают в отдельном процессе и сбрасывают кэш
+# сервера только через общий бэкенд.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+# Индекс ингредиентов и реестр тегов в памяти процесса перестраиваются
+# при смене версии в кэше, а без общего кэша - не реже чем раз
+# в IN_MEMORY_INDEX_MAX_AGE секунд.
+
+IN_MEMORY_INDEX_MAX_AGE = int(
+    os.getenv('IN_MEMORY_INDEX_MAX_AGE', default=300))
+
+# Token authentication
+# Токены кэшируются в памяти процесса на TIMEOUT секунд; SHARED включает
+# второй уровень в общем кэше (CACHES). Отозванный токен в других
+# процессах перестает приниматься не позже чем через TIMEOUT.
+
+TOKEN_CACHE = {
+    'TIMEOUT': int(os.getenv('TOKEN_CACHE_TIMEOUT', default=60)),
+    'MAX_SIZE': int(os.getenv('TOKEN_CACHE_MAX_SIZE', default=10000)),
+    'SHARED': os.getenv('TOKEN_CACHE_SHARED', default='False') == 'True',
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -144,16 +203,49 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Миниатюры изображений рецептов создаются в пуле потоков такого размера;
+# 0 - обработка сразу после сохранения рецепта в том же потоке.
+
+IMAGE_PROCESSING_WORKERS = int(
+    os.getenv('IMAGE_PROCESSING_WORKERS', default=2))
+
+# Ограничения изображения рецепта, которое приходит строкой base64.
+# Тело JSON-запроса не может быть больше закодированного изображения
+# с запасом на остальные поля; больший запрос получает 413 до чтения.
+
+RECIPE_IMAGE_MAX_SIZE = int(
+    os.getenv('RECIPE_IMAGE_MAX_SIZE', default=5 * 1024 * 1024))
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.getenv('RECIPE_IMAGE_MAX_PIXELS', default=25_000_000))
+DATA_UPLOAD_MAX_MEMORY_SIZE = RECIPE_IMAGE_MAX_SIZE * 4 // 3 + 1024 * 1024
+
+# JSON-ответы кодируются orjson, если он установлен; FAST_JSON_RENDERER=False
+# возвращает стандартный кодировщик DRF.
+
+FAST_JSON_RENDERER = os.getenv(
+    'FAST_JSON_RENDERER', default='True') == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.LimitedJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.LimitPageNumberPagination',
     'PAGE_SIZE': 6
 }
 
@@ -0,0 +1,96 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+VERSION_KEY = 'version:{}'
+MODIFIED_KEY = 'modified:{}'
+# Версии объектов, которые меняются вместе с родительской областью.
+PARENT_SCOPES = {'recipe': 'recipes'}
+
+
+def new_version():
+    """
+    Номер версии, который не повторяется и после очистки или вытеснения
+    ключей кэша, поэтому ETag и ключи кэша не могут совпасть со старыми.
+    """
+    return uuid.uuid4().hex
+
+
+def get_versions(*scopes, store=True):
+    """
+    Номера версий и время последнего изменения для областей кэширования.
+    Возвращает словарь {область: (версия, timestamp)}.
+
+    Отсутствующая версия создается с новым уникальным номером. При
+    store=False версия объекта из PARENT_SCOPES, которой нет в кэше,
+    не сохраняется, а берется из родительской области: так запросы
+    с произвольным pk в адресе не создают бессрочных ключей.
+    """
+    parents = {}
+    if not store:
+        for scope in scopes:
+            parent = PARENT_SCOPES.get(scope.split(':', 1)[0])
+            if parent and ':' in scope:
+                parents[scope] = parent
+    keys = {}
+    for scope in (*scopes, *parents.values()):
+        keys[scope] = (VERSION_KEY.format(scope), MODIFIED_KEY.format(scope))
+    stored = cache.get_many([key for pair in keys.values() for key in pair])
+    versions = {}
+    for scope, (version_key, modified_key) in keys.items():
+        if scope in parents:
+            continue
+        if version_key not in stored or modified_key not in stored:
+            now = int(timezone.now().timestamp())
+            cache.add(version_key, new_version(), None)
+            cache.add(modified_key, now, None)
+            stored[version_key] = cache.get(version_key, new_version())
+            stored[modified_key] = cache.get(modified_key, now)
+        versions[scope] = (stored[version_key], stored[modified_key])
+    for scope, parent in parents.items():
+        version_key, modified_key = keys[scope]
+        if version_key in stored and modified_key in stored:
+            versions[scope] = (stored[version_key], stored[modified_key])
+        else:
+            versions[scope] = (f'{parent}.{versions[parent][0]}',
+                               versions[parent][1])
+    return {scope: versions[scope] for scope in scopes}
+
+
+def get_version(scope):
+    return get_versions(scope)[scope][0]
+
+
+def _bump(scopes):
+    now = int(timezone.now().timestamp())
+    cache.set_many({
+        key: value
+        for scope in scopes
+        for key, value in ((VERSION_KEY.format(scope), new_version()),
+                           (MODIFIED_KEY.format(scope), now))
+    }, None)
+
+
+def bump_version(*scopes):
+    """
+    Увеличение версий областей после фиксации транзакции, чтобы
+    новая версия не стала видна раньше самих данных.
+    """
+    transaction.on_commit(lambda: _bump(scopes))
+
+
+def is_current(snapshot, version):
+    """
+    Снимок данных в памяти процесса актуален, если совпадает версия
+    и он построен не раньше IN_MEMORY_INDEX_MAX_AGE секунд назад.
+    Ограничение возраста нужно при локальном кэше: сброс версии
+    в другом процессе (например, командой load_ingredients) сюда
+    не дойдет.
+    """
+    return (snapshot.version == version
+            and time.monotonic() - snapshot.built
+            < settings.IN_MEMORY_INDEX_MAX_AGE)
@@ -1,14 +1,17 @@
 from django.contrib import admin
 from users.models import User
 
+from .images import schedule_thumbnails
 from .models import (Cart, Favorite, Ingredient, IngredientRecipe, Recipe,
                      Subscribe, Tag)
+from .signals import recipe_ingredients_changed
 
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ('name', 'measurement_unit')
-    search_fields = ('name',)
+    # Поиск по началу названия использует ingredient_name_upper_idx.
+    search_fields = ('^name',)
     empty_value_display = '-пусто-'
     list_filter = ('name',)
 
@@ -24,15 +27,25 @@ class TagAdmin(admin.ModelAdmin):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'cooking_time',
-                    'id', 'count_favorite', 'pub_date')
-    search_fields = ('name', 'author', 'tags')
+                    'id', 'count_favorite', 'carts_count', 'pub_date')
+    # Поиск по подстроке названия использует recipe_name_trgm_idx.
+    search_fields = ('name', 'author__username', 'tags__name')
     empty_value_display = '-пусто-'
     list_filter = ('name', 'author', 'tags')
 
     def count_favorite(self, obj):
-        return Favorite.objects.filter(recipe=obj).count()
+        return obj.favorites_count
 
     count_favorite.short_description = 'Число добавлении в избранное'
+    count_favorite.admin_order_field = 'favorites_count'
+
+    def save_model(self, request, obj, form, change):
+        if 'image' in form.changed_data:
+            obj.thumbnails = ''
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            previous = form.initial.get('image')
+            schedule_thumbnails(obj, previous.name if previous else None)
 
 
 @admin.register(IngredientRecipe)
@@ -42,6 +55,24 @@ class IngredientRecipeAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
     list_filter = ('recipe',)
 
+    def changed(self, recipe_ids):
+        recipe_ingredients_changed.send(sender=IngredientRecipe,
+                                        recipe_ids=set(recipe_ids))
+
+    def save_model(self, request, obj, form, change):
+        previous = form.initial.get('recipe')
+        super().save_model(request, obj, form, change)
+        self.changed({obj.recipe_id, previous} - {None})
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        self.changed([obj.recipe_id])
+
+    def delete_queryset(self, request, queryset):
+        recipe_ids = set(queryset.values_list('recipe_id', flat=True))
+        super().delete_queryset(request, queryset)
+        self.changed(recipe_ids)
+
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
@@ -69,7 +100,8 @@ class FavoriteAdmin(admin.ModelAdmin):
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email', 'id')
+    list_display = ('username', 'email', 'id',
+                    'recipes_count', 'followers_count')
     search_fields = ('username', 'email')
     empty_value_display = '-пусто-'
     list_filter = ('username', 'email')
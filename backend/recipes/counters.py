@@ -0,0 +1,68 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from users.models import User
+
+from .models import Cart, Favorite, Recipe, Subscribe
+
+# (модель со счетчиком, поле счетчика, связанная модель, внешний ключ)
+COUNTERS = (
+    (Recipe, 'favorites_count', Favorite, 'recipe'),
+    (Recipe, 'carts_count', Cart, 'recipe'),
+    (User, 'recipes_count', Recipe, 'author'),
+    (User, 'followers_count', Subscribe, 'following'),
+)
+
+
+def change_counter(model, pks, field, delta):
+    """
+    Атомарное изменение счетчика выражением F() без чтения строки.
+    """
+    if delta:
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + delta})
+
+
+def sync_counters(model, pks, *fields):
+    """
+    Пересчет счетчиков выбранных строк по фактическим данным одним
+    запросом: нужен после bulk_create, который не отправляет сигналы.
+    """
+    related = {
+        field: (related_model, foreign_key)
+        for counter_model, field, related_model, foreign_key in COUNTERS
+        if counter_model is model
+    }
+    if pks:
+        model.objects.filter(pk__in=pks).update(**{
+            field: actual_count(*related[field]) for field in fields})
+
+
+def actual_count(related_model, foreign_key):
+    return Coalesce(
+        Subquery(
+            related_model.objects.filter(
+                **{foreign_key: OuterRef('pk')}
+            ).order_by().values(foreign_key).annotate(
+                total=Count('pk')
+            ).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def recount(fix=True):
+    """
+    Сверяет счетчики с фактическим числом записей и, если fix,
+    исправляет расхождения. Возвращает число расхождений по полям.
+    """
+    mismatches = {}
+    for model, field, related_model, foreign_key in COUNTERS:
+        expression = actual_count(related_model, foreign_key)
+        broken = model.objects.annotate(
+            actual=expression
+        ).exclude(**{field: F('actual')}).values_list('pk', flat=True)
+        broken = list(broken)
+        mismatches[f'{model.__name__}.{field}'] = len(broken)
+        if fix and broken:
+            model.objects.filter(pk__in=broken).update(**{field: expression})
+    return mismatches
@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from backend.versions import bump_version
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = {
+    'list': (320, 320),
+    'card': (640, 640),
+    'detail': (1280, 1280),
+}
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+THUMBNAIL_EXTENSIONS = ('jpg', 'png', 'webp')
+
+
+def thumbnail_name(name, size, extension):
+    """recipes/image/cake.png -> recipes/image/cake.list.webp"""
+    root, _ = os.path.splitext(name)
+    return f'{root}.{size}.{extension}'
+
+
+def has_alpha(image):
+    return (image.mode in ('RGBA', 'LA')
+            or (image.mode == 'P' and 'transparency' in image.info))
+
+
+def save_image(image, name, image_format, **params):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **params)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def delete_thumbnails(name):
+    """Удаление всех миниатюр изображения name во всех форматах."""
+    for size in THUMBNAIL_SIZES:
+        for extension in THUMBNAIL_EXTENSIONS:
+            default_storage.delete(thumbnail_name(name, size, extension))
+
+
+def generate_thumbnails(name):
+    """
+    Уменьшенные копии изображения для каждого размера из THUMBNAIL_SIZES
+    в исходном формате (PNG для прозрачных, иначе JPEG) и в WebP.
+    EXIF, ICC-профиль и прочие метаданные не сохраняются, поворот
+    из EXIF применяется к пикселям заранее.
+    """
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    transparent = has_alpha(image)
+    image = image.convert('RGBA' if transparent else 'RGB')
+    for size, bounds in THUMBNAIL_SIZES.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail(bounds, Image.LANCZOS)
+        thumbnail.info = {}
+        if transparent:
+            save_image(thumbnail, thumbnail_name(name, size, 'png'), 'PNG',
+                       optimize=True)
+        else:
+            save_image(thumbnail, thumbnail_name(name, size, 'jpg'), 'JPEG',
+                       quality=JPEG_QUALITY, optimize=True, progressive=True)
+        save_image(thumbnail, thumbnail_name(name, size, 'webp'), 'WEBP',
+                   quality=WEBP_QUALITY, method=4)
+    return 'png' if transparent else 'jpg'
+
+
+def process_recipe_image(recipe_id, name):
+    """
+    Создание миниатюр и отметка о готовности. Если за это время
+    изображение заменили или рецепт удалили, созданные миниатюры
+    удаляются: новую версию обработает собственная задача.
+    """
+    try:
+        extension = generate_thumbnails(name)
+        updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+            thumbnails=extension)
+        if updated:
+            bump_version(f'recipe:{recipe_id}', 'recipes')
+        else:
+            delete_thumbnails(name)
+    except Exception:
+        logger.exception('Не удалось обработать изображение %s', name)
+
+
+class ImageProcessor:
+    """
+    Пул потоков обработки изображений в пределах процесса,
+    создается при первой задаче.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, recipe_id, name):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                    thread_name_prefix='recipe-images')
+        self._executor.submit(self.run, recipe_id, name)
+
+    @staticmethod
+    def run(recipe_id, name):
+        try:
+            process_recipe_image(recipe_id, name)
+        finally:
+            connection.close()
+
+
+image_processor = ImageProcessor()
+
+
+def schedule_thumbnails(recipe, previous=None):
+    """
+    Ставит обработку изображения в очередь после фиксации транзакции.
+    При IMAGE_PROCESSING_WORKERS = 0 обработка выполняется сразу.
+    previous - имя замененного изображения, его миниатюры удаляются.
+    """
+    recipe_id, name = recipe.pk, recipe.image.name
+
+    def submit():
+        if previous and previous != name:
+            delete_thumbnails(previous)
+        if getattr(settings, 'IMAGE_PROCESSING_WORKERS', 0):
+            image_processor.submit(recipe_id, name)
+        else:
+            process_recipe_image(recipe_id, name)
+
+    transaction.on_commit(submit)
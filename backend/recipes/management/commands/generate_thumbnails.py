@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from recipes.images import process_recipe_image
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = ('Создает миниатюры и WebP-версии изображений рецептов, '
+            'для которых они еще не готовы. Запущенным серверам миниатюры '
+            'видны сразу только при общем кэше (CACHE_BACKEND).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересоздать миниатюры всех рецептов.')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(image='')
+        if not options['all']:
+            recipes = recipes.filter(thumbnails='')
+        total = 0
+        for recipe_id, name in recipes.values_list('pk', 'image').iterator():
+            process_recipe_image(recipe_id, name)
+            total += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {total}.'))
@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import re
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recipes.models import Ingredient
+
+from backend.versions import bump_version
+
+DEFAULT_FILE = os.path.join(settings.BASE_DIR, 'data', 'ingredients.json')
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'\s*')
+ITEM_SEPARATORS = re.compile(r'[\s,]*')
+HEADER_NAMES = {'name', 'название'}
+HEADER_UNITS = {'measurement_unit', 'unit', 'единица измерения',
+                'единицы измерения'}
+
+
+def is_header(row):
+    return (row[0].strip().lower() in HEADER_NAMES
+            and row[1].strip().lower() in HEADER_UNITS)
+
+
+def iter_csv(file, header=False):
+    """
+    Строки CSV вида: название,единица измерения. Первая строка
+    пропускается при header=True или если это заголовок из HEADER_NAMES
+    и HEADER_UNITS.
+    """
+    for number, row in enumerate(csv.reader(file)):
+        if len(row) < 2 or (number == 0 and (header or is_header(row))):
+            continue
+        yield row[0], row[1]
+
+
+def iter_json(file):
+    """
+    Потоковый разбор JSON-массива объектов {name, measurement_unit}:
+    файл читается частями, а не загружается в память целиком.
+    Объекты разбираются с текущей позиции буфера, разобранная часть
+    отбрасывается только при чтении следующей порции.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    finished = False
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), ''):
+        buffer = buffer[position:] + chunk
+        position = 0
+        while not finished:
+            separators = ITEM_SEPARATORS if started else WHITESPACE
+            position = separators.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise CommandError('Ожидался JSON-массив ингредиентов.')
+                position += 1
+                started = True
+            elif buffer[position] == ']':
+                finished = True
+            else:
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    break
+                yield item['name'], item['measurement_unit']
+    if not finished:
+        raise CommandError('Файл JSON оборван или поврежден.')
+
+
+READERS = {
+    'csv': iter_csv,
+    'json': iter_json,
+}
+
+
+class Command(BaseCommand):
+    help = ('Загружает каталог ингредиентов из CSV или JSON пакетами '
+            'bulk_create, пропуская уже существующие записи. Запущенным '
+            'серверам изменение видно сразу только при общем кэше '
+            '(CACHE_BACKEND), иначе - через IN_MEMORY_INDEX_MAX_AGE.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_FILE)
+        parser.add_argument('--format', choices=READERS,
+                            help='Формат файла; по умолчанию по расширению.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--header', action='store_true',
+                            help='Пропустить первую строку CSV. Заголовок '
+                                 'name,measurement_unit пропускается '
+                                 'и без этого флага.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = (options['format']
+                       or os.path.splitext(path)[1].lstrip('.').lower())
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть больше нуля.')
+
+        started = time.perf_counter()
+        before = Ingredient.objects.count()
+        total = 0
+        seen = set()
+        with open(path, encoding='utf-8') as file:
+            if file_format == 'csv':
+                rows = iter_csv(file, options['header'])
+            else:
+                rows = READERS[file_format](file)
+            while True:
+                chunk = list(islice(rows, batch_size))
+                if not chunk:
+                    break
+                total += len(chunk)
+                batch = []
+                for name, measurement_unit in chunk:
+                    key = (name.strip(), measurement_unit.strip())
+                    if not all(key) or key in seen:
+                        continue
+                    seen.add(key)
+                    batch.append(Ingredient(name=key[0],
+                                            measurement_unit=key[1]))
+                Ingredient.objects.bulk_create(batch, ignore_conflicts=True)
+        # bulk_create не отправляет сигналы, поэтому индекс поиска
+        # и кэши сбрасываются явно.
+        bump_version('ingredients', 'recipes')
+        created = Ingredient.objects.count() - before
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано строк: {total}, уникальных: {len(seen)}, '
+            f'добавлено: {created} за {elapsed:.2f} с '
+            f'({total / elapsed if elapsed else total:.0f} строк/с).'
+        ))
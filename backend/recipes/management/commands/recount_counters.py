@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from recipes.counters import recount
+
+
+class Command(BaseCommand):
+    help = ('Сверяет денормализованные счетчики избранного, корзин, '
+            'рецептов и подписчиков с фактическими данными.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только показать расхождения.')
+
+    def handle(self, *args, **options):
+        mismatches = recount(fix=not options['check'])
+        for field, total in mismatches.items():
+            self.stdout.write(f'{field}: расхождений {total}')
+        if not any(mismatches.values()):
+            self.stdout.write(self.style.SUCCESS('Счетчики в порядке.'))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(
+                'Запустите без --check, чтобы исправить.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Счетчики исправлены.'))
@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+from recipes.ranking import recompute_popularity
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рейтинг популярности всех рецептов. '
+            'Запускается периодически, например из cron.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = recompute_popularity()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан для {total} рецептов '
+            f'за {time.perf_counter() - started:.2f} с.'))
@@ -1,22 +1,31 @@
 import json
+import os
 
+from django.conf import settings
 from django.db import migrations
 
-file = open('./data/ingredients.json', encoding="utf-8")
-INITIAL_INGREDIENTS = json.load(file)
+INGREDIENTS_FILE = os.path.join(settings.BASE_DIR, 'data', 'ingredients.json')
+
+
+def load_initial_ingredients():
+    with open(INGREDIENTS_FILE, encoding="utf-8") as file:
+        return json.load(file)
 
 
 def add_ingr(apps, schema_editor):
     Ingredient = apps.get_model("recipes", "Ingredient")
-    for ingredient in INITIAL_INGREDIENTS:
-        new_ingredient = Ingredient(**ingredient)
-        new_ingredient.save()
+    Ingredient.objects.bulk_create(
+        Ingredient(**ingredient)
+        for ingredient in load_initial_ingredients()
+    )
 
 
 def remove_ingr(apps, schema_editor):
     Ingredient = apps.get_model("recipes", "Ingredient")
-    for ingredient in INITIAL_INGREDIENTS:
-        Ingredient.objects.get(name=ingredient['name']).delete()
+    Ingredient.objects.filter(
+        name__in=[ingredient['name']
+                  for ingredient in load_initial_ingredients()]
+    ).delete()
 
 
 class Migration(migrations.Migration):
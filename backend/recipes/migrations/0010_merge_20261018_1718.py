@@ -0,0 +1,14 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:18
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_auto_20221206_0904'),
+        ('recipes', '0009_add_ingr'),
+    ]
+
+    operations = [
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:18
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0010_merge_20261018_1718'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredientrecipe',
+            name='amount',
+            field=models.IntegerField(default=1, help_text='Введите количество продукта', validators=[django.core.validators.MinValueValidator(1, message='Количество должно быть больше одного')], verbose_name='Количество продукта'),
+        ),
+        migrations.AlterField(
+            model_name='ingredientrecipe',
+            name='ingredient',
+            field=models.ForeignKey(help_text='Выберите продукты для блюда', on_delete=django.db.models.deletion.CASCADE, to='recipes.Ingredient', verbose_name='Продукты блюда'),
+        ),
+        migrations.AlterField(
+            model_name='ingredientrecipe',
+            name='recipe',
+            field=models.ForeignKey(help_text='Выберите рецепт', on_delete=django.db.models.deletion.CASCADE, to='recipes.Recipe', verbose_name='Рецепт'),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['name'], name='ingredient_name_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['name'], name='recipe_name_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:22
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_ingredients(apps, schema_editor):
+    """
+    Перед добавлением ограничения уникальности оставляет по одному
+    ингредиенту на пару (name, measurement_unit) и переносит на него
+    ссылки из рецептов.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientRecipe = apps.get_model('recipes', 'IngredientRecipe')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep_id=Min('id'), total=Count('id')).filter(total__gt=1)
+    for duplicate in duplicates:
+        extra = Ingredient.objects.filter(
+            name=duplicate['name'],
+            measurement_unit=duplicate['measurement_unit']
+        ).exclude(id=duplicate['keep_id'])
+        IngredientRecipe.objects.filter(ingredient__in=extra).update(
+            ingredient_id=duplicate['keep_id'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_recipe_pub_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_ingredients,
+            migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient'),
+        ),
+    ]
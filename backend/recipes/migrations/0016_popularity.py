@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:27
+
+from django.db import migrations, models
+from recipes.ranking import recompute_popularity
+
+
+def fill_popularity(apps, schema_editor):
+    recompute_popularity(apps.get_model('recipes', 'Recipe'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг популярности'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-popularity', '-id'], name='recipe_popularity_idx'),
+        ),
+        migrations.RunPython(fill_popularity, migrations.RunPython.noop),
+    ]
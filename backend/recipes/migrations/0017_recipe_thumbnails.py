@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_popularity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='thumbnails',
+            field=models.CharField(blank=True, editable=False, help_text='Пусто, пока миниатюры изображения не созданы', max_length=4, verbose_name='Формат готовых миниатюр'),
+        ),
+    ]
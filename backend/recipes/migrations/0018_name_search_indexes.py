@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+def create_ingredient_prefix_index(apps, schema_editor):
+    """
+    Поиск в админке по началу названия (^name) строит запрос
+    UPPER(name::text) LIKE UPPER('...%'), индекс построен по тому же
+    выражению.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS ingredient_name_upper_idx '
+        'ON recipes_ingredient ((UPPER(name::text)) text_pattern_ops)'
+    )
+
+
+def drop_ingredient_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS ingredient_name_upper_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_recipe_thumbnails'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ingredient',
+            name='ingredient_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='recipe',
+            name='recipe_name_idx',
+        ),
+        migrations.RunPython(
+            create_ingredient_prefix_index,
+            drop_ingredient_prefix_index
+        ),
+    ]
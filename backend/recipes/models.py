@@ -1,6 +1,7 @@
 from colorfield.fields import ColorField
 from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Exists, OuterRef, Prefetch, Value
 from users.models import User
 
 
@@ -16,6 +17,10 @@ class Ingredient(models.Model):
     class Meta:
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'measurement_unit'],
+                                    name='unique_ingredient')
+        ]
 
     def __str__(self):
         return self.name
@@ -42,6 +47,59 @@ class Tag(models.Model):
         return self.name
 
 
+USER_FLAGS = {'is_favorited', 'is_in_shopping_cart'}
+
+
+class RecipeQuerySet(models.QuerySet):
+    """Набор запросов рецептов с пакетной загрузкой связанных данных."""
+
+    def with_related(self):
+        """
+        Загружает автора, id тегов и ингредиенты рецептов
+        фиксированным числом запросов, независимо от размера выборки.
+        Остальные поля тегов берутся из реестра тегов.
+        """
+        return self.select_related('author').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.only('id')),
+            Prefetch(
+                'ingredientrecipe_set',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient')
+            )
+        )
+
+    def with_user_flags(self, user):
+        """
+        Аннотирует признаки is_favorited и is_in_shopping_cart
+        подзапросами Exists для переданного пользователя.
+        """
+        if not user or user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False, output_field=models.BooleanField()),
+                is_in_shopping_cart=Value(
+                    False, output_field=models.BooleanField())
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk'))),
+            is_in_shopping_cart=Exists(Cart.objects.filter(
+                user=user, recipe=OuterRef('pk')))
+        )
+
+    def count(self):
+        """
+        Признаки пользователя не влияют на число строк, но в Django 2.2
+        любая аннотация превращает COUNT(*) в подзапрос с GROUP BY,
+        поэтому перед подсчетом они отбрасываются.
+        """
+        if not USER_FLAGS & self.query.annotations.keys():
+            return super().count()
+        clone = self._chain()
+        for alias in USER_FLAGS:
+            clone.query.annotations.pop(alias, None)
+        return super(RecipeQuerySet, clone).count()
+
+
 class Recipe(models.Model):
     """ Модель рецептов """
     author = models.ForeignKey(User,
@@ -78,11 +136,38 @@ class Recipe(models.Model):
     image = models.ImageField(
         'Изображение',
         upload_to='recipes/image')
+    thumbnails = models.CharField(
+        max_length=4,
+        blank=True,
+        editable=False,
+        verbose_name='Формат готовых миниатюр',
+        help_text='Пусто, пока миниатюры изображения не созданы')
+
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число добавлений в избранное')
+    carts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число добавлений в корзину')
+    popularity = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Рейтинг популярности')
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='recipe_pub_date_id_idx'),
+            models.Index(fields=['-popularity', '-id'],
+                         name='recipe_popularity_idx'),
+        ]
 
     def __str__(self):
         return self.name
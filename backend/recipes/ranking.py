@@ -0,0 +1,63 @@
+import math
+from datetime import datetime, timezone
+
+from .models import Recipe
+
+FAVORITE_WEIGHT = 2
+CART_WEIGHT = 1
+# Каждые DECAY_SECONDS новизны весят столько же, сколько
+# десятикратный рост числа добавлений в избранное и корзины.
+DECAY_SECONDS = 45000
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+BATCH_SIZE = 1000
+
+
+def popularity_score(favorites_count, carts_count, pub_date):
+    """
+    Рейтинг популярности: логарифм взвешенного числа добавлений
+    плюс вклад даты публикации. Более новые рецепты получают больший
+    базовый рейтинг, поэтому старые опускаются без пересчета всей
+    таблицы по расписанию.
+    """
+    weight = favorites_count * FAVORITE_WEIGHT + carts_count * CART_WEIGHT
+    recency = (pub_date - EPOCH).total_seconds() / DECAY_SECONDS
+    return round(math.log10(max(weight, 1)) + recency, 7)
+
+
+def refresh_popularity(recipe_ids):
+    """
+    Пересчет рейтинга рецептов после изменения их счетчиков:
+    одно чтение и одно обновление независимо от числа рецептов.
+    """
+    recipes = list(Recipe.objects.filter(pk__in=recipe_ids).only(
+        'pk', 'favorites_count', 'carts_count', 'pub_date'))
+    for recipe in recipes:
+        recipe.popularity = popularity_score(
+            recipe.favorites_count, recipe.carts_count, recipe.pub_date)
+    if recipes:
+        Recipe.objects.bulk_update(recipes, ['popularity'])
+
+
+def recompute_popularity(recipe_model=Recipe):
+    """
+    Полный пересчет рейтинга пакетами bulk_update.
+    recipe_model позволяет передать историческую модель из миграции.
+    Возвращает число обработанных рецептов.
+    """
+    total = 0
+    batch = []
+    recipes = recipe_model.objects.only(
+        'pk', 'favorites_count', 'carts_count', 'pub_date', 'popularity'
+    ).order_by('pk').iterator(chunk_size=BATCH_SIZE)
+    for recipe in recipes:
+        recipe.popularity = popularity_score(
+            recipe.favorites_count, recipe.carts_count, recipe.pub_date)
+        batch.append(recipe)
+        if len(batch) == BATCH_SIZE:
+            recipe_model.objects.bulk_update(batch, ['popularity'])
+            total += len(batch)
+            batch = []
+    if batch:
+        recipe_model.objects.bulk_update(batch, ['popularity'])
+        total += len(batch)
+    return total
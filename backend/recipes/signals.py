@@ -0,0 +1,103 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from users.models import User
+
+from .counters import change_counter, sync_counters
+from .models import Cart, Favorite, Recipe, Subscribe
+from .ranking import refresh_popularity
+
+# Состав рецептов изменился без сигналов моделей: пакетные записи
+# IngredientRecipe и правки в админке. Аргумент recipe_ids.
+recipe_ingredients_changed = Signal()
+
+# Внешние ключи, по которым ведутся счетчики. Если сохранение меняет
+# ключ (например, автора рецепта в админке), запись переходит к другому
+# объекту и счетчики обоих пересчитываются.
+COUNTED_KEYS = {
+    Favorite: 'recipe',
+    Cart: 'recipe',
+    Recipe: 'author',
+    Subscribe: 'following',
+}
+
+
+def get_delta(signal, created=False):
+    if signal is post_delete:
+        return -1
+    return 1 if created else 0
+
+
+@receiver(pre_save, sender=Favorite)
+@receiver(pre_save, sender=Cart)
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=Subscribe)
+def remember_counted_key(sender, instance, raw=False, update_fields=None,
+                         **kwargs):
+    """Значение ключа из COUNTED_KEYS до изменения существующей записи."""
+    instance._counted_key = None
+    field = sender._meta.get_field(COUNTED_KEYS[sender])
+    if raw or instance._state.adding or (
+            update_fields is not None
+            and not {field.name, field.attname} & set(update_fields)):
+        return
+    instance._counted_key = sender.objects.filter(
+        pk=instance.pk).values_list(field.attname, flat=True).first()
+
+
+def get_moved(sender, signal, instance):
+    """
+    Прежний и новый id объекта со счетчиком, если сохранение изменило
+    ключ из COUNTED_KEYS, иначе пустой кортеж.
+    """
+    previous = instance.__dict__.pop('_counted_key', None)
+    current = getattr(
+        instance, sender._meta.get_field(COUNTED_KEYS[sender]).attname)
+    if signal is not post_save or previous in (None, current):
+        return ()
+    return (previous, current)
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+def favorite_changed(sender, signal, instance, created=False, **kwargs):
+    moved = get_moved(sender, signal, instance)
+    if moved:
+        sync_counters(Recipe, moved, 'favorites_count')
+        refresh_popularity(moved)
+        return
+    change_counter(Recipe, [instance.recipe_id], 'favorites_count',
+                   get_delta(signal, created))
+    refresh_popularity([instance.recipe_id])
+
+
+@receiver([post_save, post_delete], sender=Cart)
+def cart_changed(sender, signal, instance, created=False, **kwargs):
+    moved = get_moved(sender, signal, instance)
+    if moved:
+        sync_counters(Recipe, moved, 'carts_count')
+        refresh_popularity(moved)
+        return
+    change_counter(Recipe, [instance.recipe_id], 'carts_count',
+                   get_delta(signal, created))
+    refresh_popularity([instance.recipe_id])
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def recipe_changed(sender, signal, instance, created=False, **kwargs):
+    moved = get_moved(sender, signal, instance)
+    if moved:
+        sync_counters(User, moved, 'recipes_count')
+        return
+    change_counter(User, [instance.author_id], 'recipes_count',
+                   get_delta(signal, created))
+    if created:
+        refresh_popularity([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Subscribe)
+def subscribe_changed(sender, signal, instance, created=False, **kwargs):
+    moved = get_moved(sender, signal, instance)
+    if moved:
+        sync_counters(User, moved, 'followers_count')
+        return
+    change_counter(User, [instance.following_id], 'followers_count',
+                   get_delta(signal, created))
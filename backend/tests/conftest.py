@@ -0,0 +1,94 @@
+import pytest
+from api.authentication import token_cache
+from django.core.cache import cache
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from users.models import User
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark', 'Замеры API (pytest -m benchmark)')
+    group.addoption('--benchmark-users', type=int, default=50)
+    group.addoption('--benchmark-recipes', type=int, default=500)
+    group.addoption('--benchmark-ingredients-per-recipe', type=int,
+                    default=8)
+    group.addoption('--benchmark-favorites', type=int, default=100)
+    group.addoption('--benchmark-carts', type=int, default=20)
+    group.addoption('--benchmark-subscriptions', type=int, default=30)
+    group.addoption('--benchmark-seed', type=int, default=1)
+    group.addoption('--benchmark-iterations', type=int, default=30)
+    group.addoption('--benchmark-warmup', type=int, default=3)
+    group.addoption('--benchmark-cold', action='store_true',
+                    help='Очищать кэш перед каждым запросом.')
+    group.addoption('--benchmark-output', default='benchmark_results.json')
+    group.addoption('--benchmark-compare', metavar='PREVIOUS_JSON',
+                    help='Сравнить с результатами прошлого прогона.')
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    cache.clear()
+    token_cache.clear()
+    yield
+    cache.clear()
+    token_cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(
+        username='cook', email='cook@example.com', first_name='Cook',
+        last_name='Test', password='password-12345')
+
+
+@pytest.fixture
+def anonymous_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    client = APIClient()
+    token = Token.objects.create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+@pytest.fixture
+def make_recipes(db, user):
+    """Создает count рецептов с двумя тегами и тремя ингредиентами."""
+    def make(count):
+        tags = [
+            Tag.objects.get_or_create(
+                slug=slug, defaults={'name': slug, 'color': '#000000'})[0]
+            for slug in ('breakfast', 'dinner')
+        ]
+        ingredients = [
+            Ingredient.objects.get_or_create(
+                name=f'ingredient {number}', measurement_unit='г')[0]
+            for number in range(3)
+        ]
+        recipes = []
+        for number in range(count):
+            recipe = Recipe.objects.create(
+                author=user, name=f'Рецепт {number}', text='Описание',
+                cooking_time=10, image='recipes/image/test.png')
+            recipe.tags.set(tags)
+            IngredientRecipe.objects.bulk_create(
+                IngredientRecipe(recipe=recipe, ingredient=ingredient,
+                                 amount=100)
+                for ingredient in ingredients
+            )
+            recipes.append(recipe)
+        return recipes
+    return make
+
+
+@pytest.fixture
+def admin_client(db, client):
+    admin = User.objects.create_superuser(
+        username='admin', email='admin@example.com',
+        password='password-12345')
+    client.force_login(admin)
+    return client
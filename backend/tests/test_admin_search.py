@@ -0,0 +1,23 @@
+import pytest
+from recipes.models import Ingredient
+
+pytestmark = pytest.mark.django_db
+
+
+def test_ingredient_admin_searches_by_prefix(admin_client):
+    Ingredient.objects.create(name='тестовый продукт', measurement_unit='г')
+    Ingredient.objects.create(name='не тестовый продукт', measurement_unit='г')
+    response = admin_client.get('/admin/recipes/ingredient/',
+                                {'q': 'тестовый'})
+    assert response.status_code == 200
+    names = [ingredient.name
+             for ingredient in response.context['cl'].result_list]
+    assert 'тестовый продукт' in names
+    assert 'не тестовый продукт' not in names
+
+
+def test_recipe_admin_search(admin_client, make_recipes):
+    make_recipes(1)
+    response = admin_client.get('/admin/recipes/recipe/', {'q': 'cook'})
+    assert response.status_code == 200
+    assert len(response.context['cl'].result_list) == 1
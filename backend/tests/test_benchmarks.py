@@ -0,0 +1,78 @@
+import json
+import platform
+
+import pytest
+from api.authentication import token_cache
+from api.benchmarks import (BENCHMARK_CACHES, compare_results, run_benchmarks,
+                            run_serializer_benchmarks, seed_dataset)
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+DATASET_OPTIONS = ('users', 'recipes', 'ingredients_per_recipe', 'favorites',
+                   'carts', 'subscriptions', 'seed')
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """
+    Заменяет clear_caches из conftest: замеры, как и очистка кэша
+    до и после них, идут только в отдельном кэше BENCHMARK_CACHES.
+    """
+    with override_settings(CACHES=BENCHMARK_CACHES):
+        cache.clear()
+        token_cache.clear()
+        yield
+        cache.clear()
+        token_cache.clear()
+
+
+@pytest.fixture(scope='module')
+def report(pytestconfig):
+    """Отчет всех замеров модуля, сохраняется в JSON после них."""
+    option = pytestconfig.getoption
+    report = {
+        'created': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'cold_cache': option('benchmark_cold'),
+        'iterations': option('benchmark_iterations'),
+        'dataset': {name: option(f'benchmark_{name}')
+                    for name in DATASET_OPTIONS},
+    }
+    yield report
+    with open(option('benchmark_output'), 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+@pytest.fixture
+def benchmark_user(report):
+    return seed_dataset(**report['dataset'])
+
+
+def test_endpoints(benchmark_user, report, pytestconfig):
+    option = pytestconfig.getoption
+    results = run_benchmarks(benchmark_user, report['iterations'],
+                             option('benchmark_warmup'), report['cold_cache'])
+    report['endpoints'] = results
+    assert {name: result['status'] for name, result in results.items()
+            if result['status'] != 200} == {}
+    if option('benchmark_compare'):
+        with open(option('benchmark_compare'), encoding='utf-8') as file:
+            previous = json.load(file)
+        regressions = {
+            name: (regressions, before, after)
+            for name, before, after, regressions in compare_results(
+                previous['endpoints'], results)
+            if regressions
+        }
+        assert regressions == {}
+
+
+def test_serializers(benchmark_user, report):
+    results = run_serializer_benchmarks(benchmark_user, report['iterations'])
+    report['serializers'] = results
+    assert all(result['same_output'] for result in results.values())
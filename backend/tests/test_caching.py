@@ -0,0 +1,37 @@
+import pytest
+from django.core.cache import cache
+from recipes.models import Tag
+from users.models import User
+
+from backend.versions import get_version
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def test_etag_changes_after_cache_clear_and_edit(anonymous_client):
+    tag = Tag.objects.create(name='Завтрак', color='#E26C2D',
+                             slug='breakfast')
+    etag = anonymous_client.get(f'/api/tags/{tag.pk}/')['ETag']
+    cache.clear()
+    tag.name = 'Обед'
+    tag.save()
+    response = anonymous_client.get(f'/api/tags/{tag.pk}/',
+                                    HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+    assert response.json()['name'] == 'Обед'
+
+
+def test_missing_recipes_do_not_grow_cache(anonymous_client):
+    anonymous_client.get('/api/recipes/100000/')
+    size = len(cache._cache)
+    for pk in range(100001, 100051):
+        assert anonymous_client.get(f'/api/recipes/{pk}/').status_code == 404
+    assert len(cache._cache) == size
+
+
+def test_signup_keeps_recipe_generation():
+    version = get_version('recipes')
+    User.objects.create_user(username='new', email='new@example.com',
+                             password='password-12345')
+    assert get_version('recipes') == version
@@ -0,0 +1,52 @@
+import pytest
+from recipes.counters import recount
+from recipes.models import Cart, Favorite, Subscribe
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def other(django_user_model):
+    return django_user_model.objects.create_user(
+        username='other', email='other@example.com', password='pass-12345')
+
+
+def test_recipe_author_change_moves_recipes_count(user, other, make_recipes):
+    recipe, = make_recipes(1)
+    recipe.author = other
+    recipe.save()
+    user.refresh_from_db()
+    other.refresh_from_db()
+    assert (user.recipes_count, other.recipes_count) == (0, 1)
+    recipe.delete()
+    other.refresh_from_db()
+    assert other.recipes_count == 0
+
+
+@pytest.mark.parametrize('model, field', [(Favorite, 'favorites_count'),
+                                          (Cart, 'carts_count')])
+def test_relation_recipe_change_moves_counter(user, make_recipes,
+                                              model, field):
+    first, second = make_recipes(2)
+    relation = model.objects.create(user=user, recipe=first)
+    relation.recipe = second
+    relation.save()
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (getattr(first, field), getattr(second, field)) == (0, 1)
+    relation.delete()
+    assert not any(recount(fix=False).values())
+
+
+def test_subscription_author_change_moves_followers_count(
+        user, other, django_user_model):
+    author = django_user_model.objects.create_user(
+        username='author', email='author@example.com', password='pass-12345')
+    subscription = Subscribe.objects.create(user=user, following=author)
+    subscription.following = other
+    subscription.save()
+    author.refresh_from_db()
+    other.refresh_from_db()
+    assert (author.followers_count, other.followers_count) == (0, 1)
+    subscription.delete()
+    assert not any(recount(fix=False).values())
@@ -0,0 +1,36 @@
+import pytest
+from api.fragments import render_recipes
+from django.core.cache import cache
+from recipes.models import Recipe
+
+from backend.versions import VERSION_KEY
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def recipe_name(client, recipe):
+    response = client.get(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 200
+    return response.json()['name']
+
+
+def test_evicted_version_does_not_revive_old_fragment(anonymous_client,
+                                                      make_recipes):
+    recipe, = make_recipes(1)
+    old_name = recipe_name(anonymous_client, recipe)
+    recipe.name = 'EDITED'
+    recipe.save()
+    assert recipe_name(anonymous_client, recipe) == 'EDITED'
+
+    cache.delete(VERSION_KEY.format(f'recipe:{recipe.pk}'))
+    assert recipe_name(anonymous_client, recipe) == 'EDITED'
+    assert old_name != 'EDITED'
+
+
+def test_recipe_deleted_before_fragments_load_is_skipped(rf, make_recipes):
+    kept, deleted = make_recipes(2)
+    page = list(Recipe.objects.with_user_flags(None).filter(
+        pk__in=[kept.pk, deleted.pk]).order_by('pk'))
+    deleted.delete()
+    data = render_recipes(page, rf.get('/api/recipes/'))
+    assert [item['id'] for item in data] == [kept.pk]
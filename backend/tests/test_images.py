@@ -0,0 +1,58 @@
+import base64
+import io
+import os
+
+import pytest
+from PIL import Image
+from recipes.images import THUMBNAIL_SIZES, thumbnail_name
+from recipes.models import Ingredient, Recipe, Tag
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def image_data(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (400, 300), color).save(buffer, 'JPEG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/jpeg;base64,{encoded}'
+
+
+def thumbnail_files(media_root, name):
+    return [
+        os.path.join(media_root, thumbnail_name(name, size, extension))
+        for size in THUMBNAIL_SIZES
+        for extension in ('jpg', 'webp')
+    ]
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.IMAGE_PROCESSING_WORKERS = 0
+    return tmp_path
+
+
+def test_replaced_image_thumbnails_are_deleted(user_client, media):
+    tag = Tag.objects.create(name='Обед', color='#49B64E', slug='dinner')
+    ingredient = Ingredient.objects.create(name='мука', measurement_unit='г')
+    payload = {
+        'tags': [tag.id],
+        'ingredients': [{'id': ingredient.id, 'amount': 100}],
+        'name': 'Пирог', 'text': 'Описание', 'cooking_time': 30,
+        'image': image_data('red'),
+    }
+    response = user_client.post('/api/recipes/', payload, format='json')
+    assert response.status_code == 201
+    recipe = Recipe.objects.get(pk=response.json()['id'])
+    old_files = thumbnail_files(media, recipe.image.name)
+    assert all(os.path.exists(path) for path in old_files)
+
+    payload['image'] = image_data('blue')
+    response = user_client.patch(f'/api/recipes/{recipe.id}/', payload,
+                                 format='json')
+    assert response.status_code == 200
+    recipe.refresh_from_db()
+    assert recipe.thumbnails == 'jpg'
+    assert not any(os.path.exists(path) for path in old_files)
+    assert all(os.path.exists(path)
+               for path in thumbnail_files(media, recipe.image.name))
@@ -0,0 +1,30 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from recipes.management.commands.load_ingredients import iter_json
+from recipes.models import Ingredient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.parametrize('header, args', [
+    ('name,measurement_unit\n', []),
+    ('Продукт,Единица\n', ['--header']),
+])
+def test_csv_header_is_skipped(tmp_path, header, args):
+    path = tmp_path / 'ingredients.csv'
+    path.write_text(header + 'мука,г\nмолоко,мл\n', encoding='utf-8')
+    Ingredient.objects.all().delete()
+    call_command('load_ingredients', str(path), *args, stdout=io.StringIO())
+    assert sorted(Ingredient.objects.values_list('name', flat=True)) == [
+        'молоко', 'мука']
+
+
+def test_json_items_split_between_chunks(monkeypatch):
+    monkeypatch.setattr(
+        'recipes.management.commands.load_ingredients.CHUNK_SIZE', 7)
+    data = ' [ {"name": "мука", "measurement_unit": "г"},\n' \
+           '{"name": "соль", "measurement_unit": "г"} ] '
+    assert list(iter_json(io.StringIO(data))) == [('мука', 'г'),
+                                                  ('соль', 'г')]
@@ -0,0 +1,38 @@
+import pytest
+from recipes.models import Subscribe
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def profiling(settings):
+    settings.REQUEST_PROFILING = True
+
+
+def serializer_time(response):
+    timings = dict(
+        item.strip().split(';', 1)
+        for item in response['Server-Timing'].split(','))
+    return float(timings['serializer'].split('=')[1])
+
+
+@pytest.mark.parametrize('url', ['/api/recipes/',
+                                 '/api/users/subscriptions/'])
+def test_representations_are_profiled(profiling, user, user_client,
+                                      make_recipes, django_user_model, url):
+    author = django_user_model.objects.create_user(
+        username='author', email='author@example.com', password='pass-12345')
+    Subscribe.objects.create(user=user, following=author)
+    for recipe in make_recipes(3):
+        recipe.author = author
+        recipe.save()
+    response = user_client.get(url)
+    assert response.status_code == 200
+    assert serializer_time(response) > 0
+
+
+def test_serializer_data_is_profiled(profiling, user_client, make_recipes):
+    recipe, = make_recipes(1)
+    response = user_client.post(f'/api/recipes/{recipe.pk}/favorite/')
+    assert response.status_code == 201
+    assert serializer_time(response) > 0
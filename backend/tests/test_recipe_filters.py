@@ -0,0 +1,12 @@
+import pytest
+
+pytestmark = pytest.mark.django_db
+
+
+def test_name_filter_ignores_cyrillic_case(anonymous_client, make_recipes):
+    soup, cake = make_recipes(2)
+    soup.name = 'Суп из тыквы'
+    soup.save()
+    response = anonymous_client.get('/api/recipes/', {'name': 'суп'})
+    assert response.status_code == 200
+    assert [item['id'] for item in response.json()['results']] == [soup.id]
@@ -0,0 +1,63 @@
+import pytest
+from api.authentication import token_cache
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Favorite
+
+RECIPES_URL = '/api/recipes/?limit=10'
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(context), response.json()
+
+
+def cold_and_warm_queries(client):
+    """Число запросов с пустым кэшем и повторного запроса."""
+    cache.clear()
+    token_cache.clear()
+    cold, data = count_queries(client, RECIPES_URL)
+    warm, _ = count_queries(client, RECIPES_URL)
+    return cold, warm, data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('client_fixture', ['anonymous_client',
+                                            'user_client'])
+def test_recipe_list_queries_do_not_depend_on_page_size(
+        request, client_fixture, make_recipes):
+    client = request.getfixturevalue(client_fixture)
+    make_recipes(1)
+    single = cold_and_warm_queries(client)
+    assert len(single[2]['results']) == 1
+
+    make_recipes(9)
+    many = cold_and_warm_queries(client)
+    assert len(many[2]['results']) == 10
+
+    assert single[:2] == many[:2]
+
+
+@pytest.mark.django_db
+def test_recipe_list_user_flags(user, user_client, make_recipes):
+    recipe, *_ = make_recipes(2)
+    Favorite.objects.create(user=user, recipe=recipe)
+    _, data = count_queries(user_client, RECIPES_URL)
+    flags = {item['id']: item['is_favorited'] for item in data['results']}
+    assert flags[recipe.id] is True
+    assert sum(flags.values()) == 1
+
+
+@pytest.mark.django_db
+def test_recipe_detail_queries(user_client, make_recipes,
+                               django_assert_max_num_queries):
+    recipe, = make_recipes(1)
+    # Токен, рецепт с признаками пользователя, рецепт с автором,
+    # теги, ингредиенты и загрузка реестра тегов.
+    with django_assert_max_num_queries(6):
+        response = user_client.get(f'/api/recipes/{recipe.id}/')
+    assert response.status_code == 200
+    assert len(response.json()['ingredients']) == 3
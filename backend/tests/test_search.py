@@ -0,0 +1,40 @@
+import pytest
+from api.search import ingredient_index
+from api.tags import tag_registry
+from django.test import override_settings
+from recipes.models import Ingredient, Tag
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def test_ingredient_index_rebuilds_consistent_snapshot():
+    Ingredient.objects.all().delete()
+    Ingredient.objects.create(name='Молоко', measurement_unit='мл')
+    assert [item['name'] for item in ingredient_index.search('мол', 5)] == [
+        'Молоко']
+    snapshot = ingredient_index._get_snapshot()
+    Ingredient.objects.create(name='Мед', measurement_unit='г')
+    assert [item['name'] for item in ingredient_index.search('ме', 5)] == [
+        'Мед']
+    assert snapshot is not ingredient_index._get_snapshot()
+    assert len(snapshot.keys) == len(snapshot.items) == 1
+
+
+def test_tag_registry_rebuilds_after_change():
+    tag = Tag.objects.create(name='Обед', color='#49B64E', slug='dinner')
+    assert tag_registry.ids_for_slugs(['dinner']) == [tag.pk]
+    tag.slug = 'lunch'
+    tag.save()
+    assert tag_registry.ids_for_slugs(['dinner']) == []
+    assert tag_registry.get(tag.pk).slug == 'lunch'
+
+
+def test_ingredient_index_expires_without_version_change():
+    """Изменение из другого процесса без общего кэша версию не меняет."""
+    ingredient_index.search('мол', 5)
+    Ingredient.objects.bulk_create(
+        [Ingredient(name='Мёд луговой', measurement_unit='г')])
+    assert ingredient_index.search('мёд луг', 5) == []
+    with override_settings(IN_MEMORY_INDEX_MAX_AGE=0):
+        assert [item['name'] for item in ingredient_index.search(
+            'мёд луг', 5)] == ['Мёд луговой']
@@ -0,0 +1,65 @@
+import pytest
+from api.exports import get_shopping_list
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from recipes.models import Cart, Ingredient, IngredientRecipe
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def names(user):
+    return [(item['ingredient__name'], item['amount'])
+            for item in get_shopping_list(user)]
+
+
+@pytest.fixture
+def cart(user, make_recipes):
+    recipe, = make_recipes(1)
+    Cart.objects.create(user=user, recipe=recipe)
+    assert len(names(user)) == 3
+    return recipe
+
+
+def test_ingredient_rename_resets_cached_list(user, cart):
+    ingredient = Ingredient.objects.get(name='ingredient 0')
+    ingredient.name = 'ingredient renamed'
+    ingredient.save()
+    assert ('ingredient renamed', 100) in names(user)
+
+
+def test_admin_recipe_ingredient_edit_resets_cached_list(user, cart,
+                                                         admin_client):
+    item = IngredientRecipe.objects.filter(recipe=cart).first()
+    response = admin_client.post(
+        f'/admin/recipes/ingredientrecipe/{item.pk}/change/',
+        {'ingredient': item.ingredient_id, 'recipe': cart.pk, 'amount': 7})
+    assert response.status_code == 302
+    assert (item.ingredient.name, 7) in names(user)
+
+
+def test_api_recipe_ingredient_edit_resets_cached_list(user, user_client,
+                                                       cart):
+    items = IngredientRecipe.objects.filter(recipe=cart)
+    response = user_client.patch(f'/api/recipes/{cart.pk}/', {
+        'tags': list(cart.tags.values_list('id', flat=True)),
+        'ingredients': [{'id': item.ingredient_id, 'amount': 5}
+                        for item in items[:2]],
+        'name': cart.name, 'text': cart.text,
+        'cooking_time': cart.cooking_time,
+    }, format='json')
+    assert response.status_code == 200
+    assert [amount for _, amount in names(user)] == [5, 5]
+
+
+def test_cart_delete_resets_cached_list(user, cart):
+    Cart.objects.filter(user=user).delete()
+    assert names(user) == []
+
+
+def test_recipe_delete_resets_cached_list(user, cart):
+    with CaptureQueriesContext(connection) as context:
+        cart.delete()
+    cart_queries = [query['sql'] for query in context.captured_queries
+                    if query['sql'].startswith('SELECT "recipes_cart"')]
+    assert len(cart_queries) <= 1
+    assert names(user) == []
@@ -0,0 +1,27 @@
+import warnings
+
+import pytest
+from recipes.models import Subscribe
+from users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def test_subscription_pages_are_ordered(user, user_client):
+    authors = [
+        User.objects.create_user(username=f'author{number}',
+                                 email=f'author{number}@example.com',
+                                 password='password-12345')
+        for number in range(5)
+    ]
+    for author in authors:
+        Subscribe.objects.create(user=user, following=author)
+    ids = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        for page in (1, 2, 3):
+            response = user_client.get('/api/users/subscriptions/',
+                                       {'limit': 2, 'page': page})
+            assert response.status_code == 200
+            ids += [author['id'] for author in response.json()['results']]
+    assert ids == sorted((author.id for author in authors), reverse=True)
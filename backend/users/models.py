@@ -28,6 +28,14 @@ class User(AbstractUser):
         default=False,
         verbose_name='Подписка на данного пользователя',
         help_text='Отметьте для подписки на данного пользователя')
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число рецептов')
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число подписчиков')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name', 'password']